@@ -2,16 +2,20 @@
 API Routes - Direct Processing (No Redis/Celery)
 """
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
-from datetime import datetime
+from fastapi import APIRouter, File, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from email.utils import formatdate
 from pathlib import Path
+from typing import Optional, Tuple
 import asyncio
 import logging
 
+import orjson
+
 from app.config import Config
 from app.services.session_manager import session_manager
 from app.services.video_service import video_service
+from app.services.processing_service import processing_service
 from app.api.websocket import manager
 from app.models.responses import (
     HealthResponse,
@@ -20,22 +24,24 @@ from app.models.responses import (
 )
 from app.utils.file_utils import generate_session_id
 from app.services.cleanup_service import cleanup_service
-from app.utils.helpers import convert_numpy_types
+from app.utils.helpers import iso_timestamp, to_json_bytes
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Constant part of the health payload, merged with the per-request fields
+_HEALTH_STATIC = {"status": "healthy", "models_ready": True}
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
-        models_loaded=video_service.processor is not None,
-        models_ready=True,
-        timestamp=datetime.now().isoformat(),
-        active_sessions=session_manager.get_active_count()
-    )
+    return ORJSONResponse(_HEALTH_STATIC | {
+        "models_loaded": video_service.processor is not None,
+        "timestamp": iso_timestamp(),
+        "active_sessions": session_manager.get_active_count()
+    })
 
 
 @router.post("/api/upload")
@@ -95,7 +101,7 @@ async def analyze_video(session_id: str):
         # Update status
         session_manager.update_session(session_id, {
             "status": "processing",
-            "start_time": datetime.now().isoformat()
+            "start_time": iso_timestamp()
         })
 
         # Start async processing
@@ -117,10 +123,6 @@ async def analyze_video(session_id: str):
 
 async def process_video_direct(session_id: str):
     """Direct video processing (async background task)"""
-    from app.core.video_processor import VideoProcessor
-    from app.utils.helpers import convert_numpy_types
-    import json
-
     try:
         session = session_manager.get_session(session_id)
         if not session:
@@ -131,70 +133,44 @@ async def process_video_direct(session_id: str):
         output_path = Config.OUTPUT_FOLDER / f"analyzed_{session_id}.mp4"
         results_path = Config.OUTPUT_FOLDER / f"results_{session_id}.json"
 
-        processor = VideoProcessor()
+        async def progress_callback(progress: float, message: str):
+            """Relay worker progress (already throttled in the worker)"""
+            session_manager.update_session(session_id, {
+                "progress": progress,
+                "message": message
+            })
+
+            logger.debug(f"📊 Progress {session_id}: {progress*100:.0f}% - {message}")
 
-        # ✅ Track last sent progress to throttle updates
-        last_sent_progress = -1
-        
-        def progress_callback(progress: float, message: str):
-            """Throttled progress callback - only send every 10%"""
-            nonlocal last_sent_progress
-            
-            # Round to nearest 10%
-            progress_percent = int(progress * 100)
-            progress_milestone = (progress_percent // 10) * 10
-            
-            # Only send if we've crossed a 10% milestone
-            if progress_milestone > last_sent_progress or progress >= 1.0:
-                last_sent_progress = progress_milestone
-                
-                # Update session
-                session_manager.update_session(session_id, {
-                    "progress": progress,
-                    "message": message
-                })
-                
-                logger.info(f"📊 Progress {session_id}: {progress*100:.0f}% - {message}")
-                
-                # Send WebSocket update
-                try:
-                    import asyncio
-                    loop = asyncio.get_event_loop()
-                    if loop.is_running():
-                        # Create task to send WebSocket message
-                        asyncio.create_task(
-                            send_progress_update(session_id, progress, message)
-                        )
-                except Exception as e:
-                    logger.debug(f"WebSocket send failed: {e}")
+            await send_progress_update(session_id, progress, message)
 
         logger.info(f"Processing video: {input_path}")
-        
-        import asyncio
-        loop = asyncio.get_event_loop()
-        
-        results = await loop.run_in_executor(
-            None,
-            processor.process_video,
+
+        results = await processing_service.process_video(
+            session_id,
             input_path,
             output_path,
             progress_callback
         )
 
-        # Sanitize results
-        safe_results = convert_numpy_types(results)
+        # Serialize once (orjson handles numpy natively) and save JSON
+        results_json = to_json_bytes(results)
+        with open(results_path, 'wb') as f:
+            f.write(results_json)
+
+        output_stat = output_path.stat()
+        cleanup_service.track_added(output_stat.st_size + len(results_json), count=2)
 
-        # Save JSON
-        with open(results_path, 'w') as f:
-            json.dump(safe_results, f, indent=2, default=str)
+        # Native-typed copy for the WebSocket completion message
+        safe_results = orjson.loads(results_json)
 
-        # Update session
+        # Update session (results stay on disk to keep session memory bounded)
         session_manager.update_session(session_id, {
             "status": "completed",
             "output_path": str(output_path),
+            "output_mtime_http": formatdate(output_stat.st_mtime, usegmt=True),
             "results_path": str(results_path),
-            "end_time": datetime.now().isoformat(),
-            "results": safe_results
+            "end_time": iso_timestamp()
         })
 
         # Send completion notification
@@ -250,17 +226,51 @@ async def get_results(session_id: str):
             download_url=None
         )
 
-    return ResultsResponse(
-        success=True,
-        session_id=session_id,
-        status=session["status"],
-        results=session.get("results", {}),
-        download_url=f"/api/download/{session_id}"
+    # The results file is JSON we wrote; splice it in as-is rather than
+    # parsing, validating and re-encoding it
+    try:
+        results_json = await asyncio.to_thread(Path(session["results_path"]).read_bytes)
+    except FileNotFoundError:
+        results_json = b"{}"
+
+    envelope = orjson.dumps({
+        "success": True,
+        "session_id": session_id,
+        "status": session["status"],
+        "download_url": f"/api/download/{session_id}"
+    })
+    return Response(
+        content=envelope[:-1] + b',"results":' + results_json + b"}",
+        media_type="application/json"
     )
 
 
+def _parse_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single 'bytes=start-end' Range header into inclusive offsets"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(file_size - int(end_str), 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+
+    end = min(end, file_size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
 @router.get("/api/download/{session_id}")
-async def download_video(session_id: str):
+async def download_video(session_id: str, request: Request):
     """Download processed video"""
     session = session_manager.get_session(session_id)
     if not session:
@@ -271,30 +281,57 @@ async def download_video(session_id: str):
 
     output_path = Path(session["output_path"])
 
-    if not output_path.exists():
+    try:
+        output_stat = output_path.stat()
+    except FileNotFoundError:
+        output_stat = None
+
+    if output_stat is None or output_stat.st_size == 0:
         raise HTTPException(status_code=404, detail="Output file not found")
 
-    file_size = output_path.stat().st_size
+    # Output video is written once, so its mtime is a stable validator
+    last_modified = session.get("output_mtime_http") or formatdate(output_stat.st_mtime, usegmt=True)
+    if request.headers.get("if-modified-since") == last_modified:
+        return Response(status_code=304, headers={"Last-Modified": last_modified})
+
+    mm = video_service.get_output_mmap(output_path)
+    file_size = len(mm)
+    start, end = 0, file_size - 1
+    status_code = 200
+
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = _parse_range(range_header, file_size)
+        if byte_range is None:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{file_size}"}
+            )
+        start, end = byte_range
+        status_code = 206
 
     def iterfile():
-        with open(output_path, mode="rb") as file_like:
-            chunk_size = 8192
-            while True:
-                chunk = file_like.read(chunk_size)
-                if not chunk:
-                    break
-                yield chunk
+        chunk_size = 256 * 1024
+        for offset in range(start, end + 1, chunk_size):
+            yield mm[offset:min(offset + chunk_size, end + 1)]
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": f'inline; filename="analyzed_{session["filename"]}"',
+        "Cache-Control": "no-cache",
+        "Last-Modified": last_modified,
+        "X-Content-Type-Options": "nosniff"
+    }
+    if status_code == 206:
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
 
     return StreamingResponse(
         iterfile(),
+        status_code=status_code,
         media_type="video/mp4",
-        headers={
-            "Accept-Ranges": "bytes",
-            "Content-Length": str(file_size),
-            "Content-Disposition": f'inline; filename="analyzed_{session["filename"]}"',
-            "Cache-Control": "no-cache",
-            "X-Content-Type-Options": "nosniff"
-        }
+        headers=headers
     )
 
 
@@ -305,7 +342,7 @@ async def delete_session(session_id: str):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    video_service.cleanup_session_files(session)
+    await asyncio.to_thread(video_service.cleanup_session_files, session)
     session_manager.delete_session(session_id)
 
     return {
@@ -339,15 +376,13 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             "session_id": session_id
         })
 
+        # Liveness is handled by protocol-level ping frames (uvicorn ws_ping_interval),
+        # so only wake up for real client messages
         while True:
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-
-                if data == "ping":
-                    await websocket.send_json({"type": "pong"})
+            data = await websocket.receive_text()
 
-            except asyncio.TimeoutError:
-                await websocket.send_json({"type": "keepalive"})
+            if data == "ping":
+                await websocket.send_json({"type": "pong"})
 
     except WebSocketDisconnect:
         manager.disconnect(session_id)
@@ -360,7 +395,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 @router.get("/api/admin/storage")
 async def get_storage_stats():
     """Get storage statistics"""
-    return cleanup_service.get_storage_stats()
+    return await asyncio.to_thread(cleanup_service.get_storage_stats)
 
 
 @router.post("/api/admin/cleanup")
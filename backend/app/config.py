@@ -27,7 +27,8 @@ class Config:
     API_PORT: int = int(os.getenv("PORT", os.getenv("API_PORT", "7860")))  # HF uses PORT env var
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
 
-    # CORS Settings
+    # CORS Settings (disable for same-origin deployments where CORS is pure overhead)
+    ENABLE_CORS: bool = os.getenv("ENABLE_CORS", "True").lower() == "true"
     CORS_ORIGINS: list = field(default_factory=lambda: os.getenv(
         "CORS_ORIGINS", "*"
     ).split(","))
@@ -37,6 +38,7 @@ class Config:
     UPLOAD_FOLDER: Path = BASE_DIR / "uploads"
     OUTPUT_FOLDER: Path = BASE_DIR / "outputs"
     SAMPLE_FOLDER: Path = BASE_DIR / "sample_videos"
+    FRONTEND_PATH: str = os.getenv("FRONTEND_PATH", "")  # Skips frontend probing when set
 
     # File limits
     # MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", 104857600))  # 100MB
@@ -86,11 +88,15 @@ class Config:
     VELOCITY_DANCING: float = 0.06
     VELOCITY_JUMPING: float = 0.12
 
+    # Shoulder-to-hip height (normalized) below which a pose counts as crouching
+    CROUCH_TORSO_THRESHOLD: float = 0.15
+
     MOVEMENT_INTENSITY_LOW: float = 0.02
     MOVEMENT_INTENSITY_MEDIUM: float = 0.05
     MOVEMENT_INTENSITY_HIGH: float = 0.08
 
     MOVEMENT_SMOOTHING_WINDOW: int = 5
+    MOVEMENT_MAX_HISTORY: int = int(os.getenv("MOVEMENT_MAX_HISTORY", 1000))
 
     # ==================== Visualization Configuration ====================
     SKELETON_COLOR_HIGH_CONF: tuple = (0, 255, 0)
@@ -107,6 +113,7 @@ class Config:
 
     # ==================== Session Management ====================
     SESSION_TIMEOUT: int = int(os.getenv("SESSION_TIMEOUT", 3600))
+    MAX_STORED_SESSIONS: int = int(os.getenv("MAX_STORED_SESSIONS", 256))
     MAX_CONCURRENT_SESSIONS: int = int(
         os.getenv("MAX_CONCURRENT_SESSIONS", 5 if IS_HF_SPACE else 10)
     )
@@ -132,7 +139,10 @@ class Config:
     ENABLE_PROFILING: bool = os.getenv(
         "ENABLE_PROFILING", "False"
     ).lower() == "true"
-    MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 1 if IS_HF_SPACE else 2))
+    # Processing pool size; defaults to the CPUs available to this process
+    MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 1 if IS_HF_SPACE else (
+        len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 2)
+    )))
 
     # ==================== Helper Methods ====================
 
@@ -191,6 +201,7 @@ class Config:
 
             assert cls.MAX_FILE_SIZE > 0, "Max file size must be positive"
             assert cls.TARGET_FPS > 0, "Target FPS must be positive"
+            assert cls.MOVEMENT_MAX_HISTORY >= 1, "Movement history size must be at least 1"
             assert 1 <= cls.API_PORT <= 65535, "Port must be between 1 and 65535"
 
             return True
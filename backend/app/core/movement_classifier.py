@@ -4,14 +4,15 @@ Classifies dance movements, calculates intensity, and detects patterns
 """
 
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from collections import Counter, deque
+from typing import Deque, List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
 from app.config import Config
 from app.core.pose_analyzer import PoseKeypoints
-from app.utils.validation import safe_divide
+from app.utils.validation import safe_divide, safe_divide_arr
 
 logger = logging.getLogger(__name__)
 
@@ -51,17 +52,60 @@ class MovementClassifier:
         "right_leg": [24, 26, 28, 30, 32]  # Right hip to foot
     }
     
-    def __init__(self, smoothing_window: int = 5):
+    # Index arrays built once (intp, so fancy indexing needs no conversion)
+    # and frozen, since they are shared by every instance
+    for _part, _indices in BODY_PARTS.items():
+        BODY_PARTS[_part] = np.array(_indices, dtype=np.intp)
+        BODY_PARTS[_part].flags.writeable = False
+    del _part, _indices
+    
+    # (parts, 33) averaging weights: row p is 1/len(part) on that part's
+    # landmarks, so one matmul gives every part's mean displacement
+    # (parts overlap at the shoulders and hips, so a bincount won't do)
+    _PART_WEIGHTS = np.zeros((len(BODY_PARTS), 33))
+    for _row, _indices in zip(_PART_WEIGHTS, BODY_PARTS.values()):
+        _row[_indices] = 1.0 / len(_indices)
+    del _row, _indices
+    
+    def __init__(self, smoothing_window: int = 5,
+                 max_history: int = Config.MOVEMENT_MAX_HISTORY):
         """
         Initialize movement classifier
         
         Args:
             smoothing_window: Number of frames for smoothing calculations
+            max_history: Most recent analyzed sequences kept for the summary
         """
+        if max_history < 1:
+            raise ValueError(f"max_history must be at least 1, got {max_history}")
+        
         self.smoothing_window = smoothing_window
-        self.movement_history: List[MovementMetrics] = []
+        self.movement_history: Deque[MovementMetrics] = deque(maxlen=max_history)
+        self._reset_totals()
         logger.info("MovementClassifier initialized")
     
+    def _reset_totals(self):
+        """Zero the running totals behind get_movement_summary"""
+        self._type_counts: Counter = Counter()
+        self._intensity_sum = 0.0
+        self._part_activity_sums = dict.fromkeys(self.BODY_PARTS, 0.0)
+    
+    def _record(self, metrics: MovementMetrics):
+        """Append to the bounded history, keeping the running totals in step"""
+        history = self.movement_history
+        if len(history) == history.maxlen:
+            self._update_totals(history[0], -1)
+        
+        history.append(metrics)
+        self._update_totals(metrics, 1)
+    
+    def _update_totals(self, metrics: MovementMetrics, sign: int):
+        """Add (sign=1) or remove (sign=-1) one sequence's contribution"""
+        self._type_counts[metrics.movement_type.value] += sign
+        self._intensity_sum += sign * metrics.intensity
+        for part, activity in metrics.body_part_activity.items():
+            self._part_activity_sums[part] += sign * activity
+    
     def analyze_sequence(self, keypoints_sequence: List[PoseKeypoints]) -> MovementMetrics:
         """
         Analyze a sequence of pose keypoints to classify movement
@@ -75,20 +119,23 @@ class MovementClassifier:
         if not keypoints_sequence:
             return self._create_empty_metrics()
         
+        # Stack the sequence once; every helper below works on these arrays
+        landmarks, timestamps = self._stack_sequence(keypoints_sequence)
+        
         # Calculate velocities between consecutive frames
-        velocities = self._calculate_velocities(keypoints_sequence)
+        velocities = self._calculate_velocities(landmarks, timestamps)
         
         # Calculate average velocity (overall movement speed)
         avg_velocity = np.mean(velocities) if len(velocities) > 0 else 0.0
         
         # Classify movement type based on velocity and pose characteristics
-        movement_type = self._classify_movement(keypoints_sequence, avg_velocity)
+        movement_type = self._classify_movement(landmarks, avg_velocity)
         
         # Calculate movement intensity (0-100 scale)
         intensity = self._calculate_intensity(velocities, movement_type)
         
         # Analyze activity per body part
-        body_part_activity = self._calculate_body_part_activity(keypoints_sequence)
+        body_part_activity = self._calculate_body_part_activity(landmarks)
         
         # Get frame range
         frame_range = (
@@ -104,65 +151,67 @@ class MovementClassifier:
             frame_range=frame_range
         )
         
-        self.movement_history.append(metrics)
+        self._record(metrics)
         
         logger.info(f"Analyzed sequence: {movement_type.value}, "
                    f"Intensity: {intensity:.1f}, Velocity: {avg_velocity:.4f}")
         
         return metrics
     
-    def _calculate_velocities(self, keypoints_sequence: List[PoseKeypoints]) -> np.ndarray:
+    @staticmethod
+    def _stack_sequence(keypoints_sequence: List[PoseKeypoints]) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate frame-to-frame velocities for all keypoints
+        Stack a keypoints sequence into contiguous arrays
         
         Args:
             keypoints_sequence: List of pose keypoints
         
+        Returns:
+            Tuple of landmarks (N, 33, 3) and timestamps (N,)
+        """
+        landmarks = np.stack([kp.landmarks for kp in keypoints_sequence])
+        timestamps = np.fromiter((kp.timestamp for kp in keypoints_sequence),
+                                 dtype=np.float64, count=len(keypoints_sequence))
+        return landmarks, timestamps
+    
+    def _calculate_velocities(self, landmarks: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Calculate frame-to-frame velocities for all keypoints
+        
+        Args:
+            landmarks: Stacked landmarks of shape (N, 33, 3)
+            timestamps: Frame timestamps of shape (N,)
+        
         Returns:
             Array of velocities (one per frame transition)
         """
-        if len(keypoints_sequence) < 2:
+        if len(landmarks) < 2:
             return np.array([0.0])
         
-        velocities = []
-        
-        for i in range(1, len(keypoints_sequence)):
-            prev_landmarks = keypoints_sequence[i-1].landmarks[:, :2]  # x, y only
-            curr_landmarks = keypoints_sequence[i].landmarks[:, :2]
-            
-            # Calculate Euclidean distance for each keypoint
-            displacement = np.linalg.norm(curr_landmarks - prev_landmarks, axis=1)
-            
-            # Average displacement across all keypoints
-            avg_displacement = np.mean(displacement)
-            
-            # Time difference (assuming constant fps)
-            time_diff = keypoints_sequence[i].timestamp - keypoints_sequence[i-1].timestamp
-            
-            # Velocity = displacement / time
-            velocity = safe_divide(avg_displacement, time_diff, 0.0)
-            velocities.append(velocity)
-        
-        return np.array(velocities)
+        # Euclidean x, y distance for each keypoint, averaged across keypoints
+        avg_displacement = np.linalg.norm(np.diff(landmarks[..., :2], axis=0), axis=2).mean(axis=1)
+        
+        # Velocity = displacement / time (zero where frames share a timestamp)
+        return safe_divide_arr(avg_displacement, np.diff(timestamps), 0.0)
     
-    def _classify_movement(self, keypoints_sequence: List[PoseKeypoints], 
+    def _classify_movement(self, landmarks: np.ndarray, 
                           avg_velocity: float) -> MovementType:
         """
         Classify movement type based on velocity and pose characteristics
         
         Args:
-            keypoints_sequence: List of pose keypoints
+            landmarks: Stacked landmarks of shape (N, 33, 3)
             avg_velocity: Average velocity across sequence
         
         Returns:
             MovementType classification
         """
         # Check for jumping (vertical movement of center of mass)
-        if self._detect_jumping(keypoints_sequence):
+        if self._detect_jumping(landmarks):
             return MovementType.JUMPING
         
         # Check for crouching (low body position)
-        if self._detect_crouching(keypoints_sequence):
+        if self._detect_crouching(landmarks):
             return MovementType.CROUCHING
         
         # Classify based on velocity thresholds
@@ -176,66 +225,48 @@ class MovementClassifier:
             # High velocity movements are likely dancing
             return MovementType.DANCING
     
-    def _detect_jumping(self, keypoints_sequence: List[PoseKeypoints]) -> bool:
+    def _detect_jumping(self, landmarks: np.ndarray) -> bool:
         """
         Detect jumping motion by analyzing vertical hip movement
         
         Args:
-            keypoints_sequence: List of pose keypoints
+            landmarks: Stacked landmarks of shape (N, 33, 3)
         
         Returns:
             True if jumping detected
         """
-        if len(keypoints_sequence) < 5:
+        if len(landmarks) < 5:
             return False
         
-        # Get hip positions (landmarks 23 and 24)
-        hip_y_positions = []
-        for kp in keypoints_sequence:
-            left_hip_y = kp.landmarks[23, 1]
-            right_hip_y = kp.landmarks[24, 1]
-            avg_hip_y = (left_hip_y + right_hip_y) / 2
-            hip_y_positions.append(avg_hip_y)
-        
-        hip_y_positions = np.array(hip_y_positions)
-        
-        # Calculate vertical velocity
-        vertical_velocity = np.abs(np.diff(hip_y_positions))
+        # Average hip height per frame (landmarks 23 and 24)
+        hip_y_positions = (landmarks[:, 23, 1] + landmarks[:, 24, 1]) / 2
         
         # Jumping has high vertical velocity peaks
-        max_vertical_velocity = np.max(vertical_velocity)
+        max_vertical_velocity = np.abs(np.diff(hip_y_positions)).max()
         
-        return max_vertical_velocity > Config.VELOCITY_JUMPING
+        return bool(max_vertical_velocity > Config.VELOCITY_JUMPING)
     
-    def _detect_crouching(self, keypoints_sequence: List[PoseKeypoints]) -> bool:
+    def _detect_crouching(self, landmarks: np.ndarray) -> bool:
         """
         Detect crouching by analyzing hip-to-shoulder distance
         
         Args:
-            keypoints_sequence: List of pose keypoints
+            landmarks: Stacked landmarks of shape (N, 33, 3)
         
         Returns:
             True if crouching detected
         """
-        if not keypoints_sequence:
+        if len(landmarks) == 0:
             return False
         
         # Use middle frame for analysis
-        mid_idx = len(keypoints_sequence) // 2
-        landmarks = keypoints_sequence[mid_idx].landmarks
-        
-        # Calculate average shoulder position (landmarks 11, 12)
-        shoulder_y = (landmarks[11, 1] + landmarks[12, 1]) / 2
+        mid_frame = landmarks[len(landmarks) // 2]
         
-        # Calculate average hip position (landmarks 23, 24)
-        hip_y = (landmarks[23, 1] + landmarks[24, 1]) / 2
+        # Torso length: shoulder (11, 12) to hip (23, 24) average height
+        torso_length = abs(mid_frame[[23, 24], 1].mean() - mid_frame[[11, 12], 1].mean())
         
-        # Calculate torso length
-        torso_length = abs(hip_y - shoulder_y)
-        
-        # Crouching: torso is compressed (small torso length)
-        # This is relative, so we use a threshold
-        return torso_length < 0.15  # Normalized coordinates
+        # Crouching: torso is compressed (small torso length, normalized coordinates)
+        return bool(torso_length < Config.CROUCH_TORSO_THRESHOLD)
     
     def _calculate_intensity(self, velocities: np.ndarray, 
                             movement_type: MovementType) -> float:
@@ -278,47 +309,33 @@ class MovementClassifier:
         # Clamp to 0-100 range
         return np.clip(intensity, 0, 100)
     
-    def _calculate_body_part_activity(self, 
-                                     keypoints_sequence: List[PoseKeypoints]) -> Dict[str, float]:
+    def _calculate_body_part_activity(self, landmarks: np.ndarray) -> Dict[str, float]:
         """
         Calculate activity level for each body part
         
         Args:
-            keypoints_sequence: List of pose keypoints
+            landmarks: Stacked landmarks of shape (N, 33, 3)
         
         Returns:
             Dictionary mapping body part names to activity scores (0-100)
         """
-        if len(keypoints_sequence) < 2:
+        if len(landmarks) < 2:
             return {part: 0.0 for part in self.BODY_PARTS.keys()}
         
-        activity_scores = {}
-        
-        for part_name, landmark_indices in self.BODY_PARTS.items():
-            total_movement = 0.0
-            
-            # Calculate movement for this body part across all frames
-            for i in range(1, len(keypoints_sequence)):
-                prev_landmarks = keypoints_sequence[i-1].landmarks[landmark_indices, :2]
-                curr_landmarks = keypoints_sequence[i].landmarks[landmark_indices, :2]
-                
-                # Calculate average movement for this body part
-                displacement = np.linalg.norm(curr_landmarks - prev_landmarks, axis=1)
-                avg_displacement = np.mean(displacement)
-                
-                total_movement += avg_displacement
-            
-            # Normalize to 0-100 scale
-            avg_movement = total_movement / (len(keypoints_sequence) - 1)
-            activity_score = min(avg_movement * 1000, 100)  # Scale and cap at 100
-            
-            activity_scores[part_name] = activity_score
-        
-        return activity_scores
+        # Per-landmark x, y displacement for every frame transition: (N-1, 33)
+        displacement = np.linalg.norm(np.diff(landmarks[..., :2], axis=0), axis=2)
+        
+        # Average movement of each body part per transition, then across frames
+        avg_movement = (displacement @ self._PART_WEIGHTS.T).mean(axis=0)
+        
+        # Normalize to 0-100 scale
+        activity_scores = np.minimum(avg_movement * 1000, 100)  # Scale and cap at 100
+        
+        return dict(zip(self.BODY_PARTS, activity_scores.tolist()))
     
     def get_movement_summary(self) -> Dict[str, any]:
         """
-        Get summary statistics of all analyzed movements
+        Get summary statistics of the analyzed movements still in history
         
         Returns:
             Dictionary with summary statistics
@@ -331,26 +348,17 @@ class MovementClassifier:
                 "most_active_body_part": "none"
             }
         
-        # Count movement types
-        movement_counts = {}
-        for metrics in self.movement_history:
-            movement_type = metrics.movement_type.value
-            movement_counts[movement_type] = movement_counts.get(movement_type, 0) + 1
+        count = len(self.movement_history)
         
-        # Calculate average intensity
-        avg_intensity = np.mean([m.intensity for m in self.movement_history])
+        # Movement type counts, dropping types no longer in the history
+        movement_counts = {t: n for t, n in self._type_counts.items() if n > 0}
         
-        # Find most active body part across all sequences
-        all_body_parts = {}
-        for metrics in self.movement_history:
-            for part, activity in metrics.body_part_activity.items():
-                if part not in all_body_parts:
-                    all_body_parts[part] = []
-                all_body_parts[part].append(activity)
+        # Averages come from running totals kept by _record
+        avg_intensity = self._intensity_sum / count
         
         avg_body_part_activity = {
-            part: np.mean(activities) 
-            for part, activities in all_body_parts.items()
+            part: total / count
+            for part, total in self._part_activity_sums.items()
         }
         
         most_active_part = max(avg_body_part_activity.items(), key=lambda x: x[1])[0]
@@ -381,7 +389,7 @@ class MovementClassifier:
             return {"has_rhythm": False, "estimated_bpm": 0}
         
         # Calculate velocities
-        velocities = self._calculate_velocities(keypoints_sequence)
+        velocities = self._calculate_velocities(*self._stack_sequence(keypoints_sequence))
         
         # Apply smoothing
         if len(velocities) > self.smoothing_window:
@@ -426,20 +434,16 @@ class MovementClassifier:
             Array of peak indices
         """
         if len(signal) < 3:
-            return np.array([])
+            return np.array([], dtype=np.intp)
         
         # Calculate threshold
         threshold = np.percentile(signal, threshold_percentile)
         
-        peaks = []
-        for i in range(1, len(signal) - 1):
-            # Peak: higher than neighbors and above threshold
-            if (signal[i] > signal[i-1] and 
-                signal[i] > signal[i+1] and 
-                signal[i] > threshold):
-                peaks.append(i)
+        # Peak: higher than neighbors and above threshold
+        inner = signal[1:-1]
+        is_peak = (inner > signal[:-2]) & (inner > signal[2:]) & (inner > threshold)
         
-        return np.array(peaks)
+        return np.flatnonzero(is_peak) + 1
     
     def calculate_movement_smoothness(self, keypoints_sequence: List[PoseKeypoints]) -> float:
         """
@@ -455,7 +459,7 @@ class MovementClassifier:
             return 100.0  # Not enough data
         
         # Calculate velocities
-        velocities = self._calculate_velocities(keypoints_sequence)
+        velocities = self._calculate_velocities(*self._stack_sequence(keypoints_sequence))
         
         if len(velocities) < 2:
             return 100.0
@@ -483,4 +487,5 @@ class MovementClassifier:
     def reset(self):
         """Reset movement history"""
         self.movement_history.clear()
+        self._reset_totals()
         logger.info("MovementClassifier reset")
\ No newline at end of file
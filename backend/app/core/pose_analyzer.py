@@ -5,10 +5,12 @@ Handles video frame processing and skeleton overlay generation
 
 import cv2
 import numpy as np
-import mediapipe as mp
 from typing import List, Tuple, Optional, Dict, Any
 from dataclasses import dataclass
 import logging
+import queue
+import sys
+import threading
 
 from app.config import Config
 from app.utils.helpers import timing_decorator
@@ -19,21 +21,95 @@ logger = logging.getLogger(__name__)
 @dataclass
 class PoseKeypoints:
     """Data class for storing pose keypoints from a single frame"""
-    landmarks: np.ndarray  # Shape: (33, 3) - x, y, visibility
+    landmarks: np.ndarray  # Shape: (33, 3) float32 - x, y, visibility
     frame_number: int
     timestamp: float
     confidence: float  # Average visibility score
 
 
+class KeypointsHistory:
+    """
+    Append-only pose history stored as parallel arrays
+    
+    Landmarks for all frames share one (capacity, 33, 3) buffer that doubles
+    when full, so the whole history is available as a single array without
+    stacking per-frame objects. Supports the list operations the analyzer
+    uses: append, len, indexing, iteration and clear.
+    """
+    
+    def __init__(self, capacity: int = 256):
+        self._landmarks = np.empty((capacity, 33, 3), dtype=np.float32)
+        self._frame_numbers = np.empty(capacity, dtype=np.int64)
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._confidences = np.empty(capacity, dtype=np.float32)
+        self._n = 0
+    
+    def _grow(self):
+        """Double the capacity of every buffer"""
+        n = self._n
+        for name in ("_landmarks", "_frame_numbers", "_timestamps", "_confidences"):
+            old = getattr(self, name)
+            new = np.empty((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+    
+    def append(self, keypoints: PoseKeypoints):
+        """Copy one frame's keypoints into the buffers"""
+        if self._n == len(self._landmarks):
+            self._grow()
+        
+        i = self._n
+        self._landmarks[i] = keypoints.landmarks
+        self._frame_numbers[i] = keypoints.frame_number
+        self._timestamps[i] = keypoints.timestamp
+        self._confidences[i] = keypoints.confidence
+        self._n = i + 1
+    
+    def clear(self):
+        """Forget all frames, keeping the allocated buffers"""
+        self._n = 0
+    
+    def __len__(self) -> int:
+        return self._n
+    
+    def __getitem__(self, index: int) -> PoseKeypoints:
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError("keypoints history index out of range")
+        
+        return PoseKeypoints(
+            landmarks=self._landmarks[index].copy(),
+            frame_number=int(self._frame_numbers[index]),
+            timestamp=float(self._timestamps[index]),
+            confidence=float(self._confidences[index])
+        )
+    
+    def __iter__(self):
+        return (self[i] for i in range(self._n))
+    
+    @staticmethod
+    def _readonly(view: np.ndarray) -> np.ndarray:
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def landmarks(self) -> np.ndarray:
+        """Read-only (N, 33, 3) view of all landmarks"""
+        return self._readonly(self._landmarks[:self._n])
+    
+    @property
+    def confidences(self) -> np.ndarray:
+        """Read-only (N,) view of per-frame confidences"""
+        return self._readonly(self._confidences[:self._n])
+
+
 class PoseAnalyzer:
     """
     MediaPipe-based pose detection and analysis engine
     Processes video frames to extract body keypoints and generate skeleton overlays
     """
     
-    # MediaPipe pose connections for skeleton drawing
-    POSE_CONNECTIONS = mp.solutions.pose.POSE_CONNECTIONS
-    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         Initialize pose analyzer with MediaPipe
@@ -41,6 +117,10 @@ class PoseAnalyzer:
         Args:
             config: Optional configuration dictionary (uses Config class defaults if None)
         """
+        # Imported here so modules that only need PoseKeypoints (and their
+        # tests) don't pay MediaPipe's import time
+        import mediapipe as mp
+        
         self.config = config or Config.get_mediapipe_config()
         
         # Initialize MediaPipe Pose
@@ -48,6 +128,9 @@ class PoseAnalyzer:
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
+        # MediaPipe pose connections for skeleton drawing
+        self.POSE_CONNECTIONS = self.mp_pose.POSE_CONNECTIONS
+        
         # Create pose detector instance
         self.pose = self.mp_pose.Pose(
             static_image_mode=False,
@@ -57,7 +140,7 @@ class PoseAnalyzer:
             min_tracking_confidence=self.config['min_tracking_confidence']
         )
         
-        self.keypoints_history: List[PoseKeypoints] = []
+        self.keypoints_history = KeypointsHistory()
         logger.info("PoseAnalyzer initialized with MediaPipe Pose")
     
     def process_frame(self, frame: np.ndarray, frame_number: int, 
@@ -79,39 +162,57 @@ class PoseAnalyzer:
         # Process frame with MediaPipe
         results = self.pose.process(rgb_frame)
         
-        if results.pose_landmarks:
-            # Extract landmarks as numpy array
-            landmarks = self._extract_landmarks(results.pose_landmarks)
-            
-            # Calculate average confidence (visibility score)
-            confidence = np.mean(landmarks[:, 2])
-            
-            # Create PoseKeypoints object
-            pose_data = PoseKeypoints(
-                landmarks=landmarks,
-                frame_number=frame_number,
-                timestamp=timestamp,
-                confidence=confidence
-            )
-            
-            return pose_data
+        return self._to_keypoints(results.pose_landmarks, frame_number, timestamp)
+    
+    def _to_keypoints(self, pose_landmarks, frame_number: int,
+                      timestamp: float) -> Optional[PoseKeypoints]:
+        """
+        Convert raw MediaPipe landmarks into PoseKeypoints
         
-        return None
+        Args:
+            pose_landmarks: MediaPipe pose landmarks, or None if no pose was found
+            frame_number: Frame index in video
+            timestamp: Timestamp in seconds
+        
+        Returns:
+            PoseKeypoints object if pose detected, None otherwise
+        """
+        if not pose_landmarks:
+            return None
+        
+        # Extract landmarks as numpy array
+        landmarks = self._extract_landmarks(pose_landmarks)
+        
+        # Calculate average confidence (visibility score)
+        confidence = np.mean(landmarks[:, 2])
+        
+        # Create PoseKeypoints object
+        return PoseKeypoints(
+            landmarks=landmarks,
+            frame_number=frame_number,
+            timestamp=timestamp,
+            confidence=confidence
+        )
     
     def _extract_landmarks(self, pose_landmarks) -> np.ndarray:
         """
         Extract landmarks from MediaPipe results as numpy array
         
         Args:
-            pose_landmarks: MediaPipe pose landmarks object
+            pose_landmarks: MediaPipe pose landmarks object, or an array-like
+                of shape (33, 3) already holding x, y, visibility
         
         Returns:
-            Numpy array of shape (33, 3) containing x, y, visibility
+            Float32 numpy array of shape (33, 3) containing x, y, visibility
         """
-        landmarks = []
-        for landmark in pose_landmarks.landmark:
-            landmarks.append([landmark.x, landmark.y, landmark.visibility])
-        return np.array(landmarks)
+        # Pre-built arrays skip the per-landmark attribute reads entirely
+        if hasattr(pose_landmarks, "__array__"):
+            return np.asarray(pose_landmarks, dtype=np.float32).reshape(-1, 3)
+        
+        # MediaPipe stores landmarks as float32, so nothing is lost here
+        landmark_list = pose_landmarks.landmark
+        values = (v for lm in landmark_list for v in (lm.x, lm.y, lm.visibility))
+        return np.fromiter(values, dtype=np.float32, count=3 * len(landmark_list)).reshape(-1, 3)
     
     def draw_skeleton_overlay(self, frame: np.ndarray, 
                               pose_keypoints: Optional[PoseKeypoints],
@@ -255,23 +356,66 @@ class PoseAnalyzer:
         Returns:
             List of PoseKeypoints (None for frames without detected pose)
         """
+        # Two-stage pipeline: a worker thread runs inference (MediaPipe releases
+        # the GIL inside its graph) while this thread converts the previous
+        # frame's landmarks. A single worker keeps frames in order, which
+        # tracking mode relies on.
+        raw_landmarks: queue.Queue = queue.Queue()
+        
+        def infer():
+            try:
+                for rgb_frame in self._to_rgb_batch(frames):
+                    raw_landmarks.put(self.pose.process(rgb_frame).pose_landmarks)
+            except Exception as e:
+                raw_landmarks.put(e)
+        
+        worker = threading.Thread(target=infer, name="pose-inference", daemon=True)
+        worker.start()
+        
         results = []
         
-        for i, frame in enumerate(frames):
-            frame_number = start_frame_number + i
-            timestamp = frame_number / fps
-            
-            pose_data = self.process_frame(frame, frame_number, timestamp)
-            results.append(pose_data)
-            
-            if pose_data:
-                self.keypoints_history.append(pose_data)
+        try:
+            for i in range(len(frames)):
+                pose_landmarks = raw_landmarks.get()
+                if isinstance(pose_landmarks, Exception):
+                    raise pose_landmarks
+                
+                frame_number = start_frame_number + i
+                timestamp = frame_number / fps
+                
+                pose_data = self._to_keypoints(pose_landmarks, frame_number, timestamp)
+                results.append(pose_data)
+                
+                if pose_data:
+                    self.keypoints_history.append(pose_data)
+        finally:
+            worker.join()
         
         logger.info(f"Processed {len(frames)} frames, detected pose in "
                    f"{sum(1 for r in results if r is not None)} frames")
         
         return results
     
+    @staticmethod
+    def _to_rgb_batch(frames: List[np.ndarray]):
+        """
+        Convert BGR frames to RGB, in one cvtColor call when shapes match
+        
+        Args:
+            frames: List of BGR frames
+        
+        Returns:
+            Sequence of contiguous RGB frames in input order
+        """
+        if len(frames) < 2 or any(f.shape != frames[0].shape for f in frames):
+            return (cv2.cvtColor(f, cv2.COLOR_BGR2RGB) for f in frames)
+        
+        # Stack as one tall image so the conversion runs once over all rows
+        height, width = frames[0].shape[:2]
+        stacked = np.concatenate(frames, axis=0)
+        rgb = cv2.cvtColor(stacked, cv2.COLOR_BGR2RGB)
+        return rgb.reshape(len(frames), height, width, 3)
+    
     def get_keypoints_array(self) -> np.ndarray:
         """
         Get all detected keypoints as a numpy array
@@ -282,7 +426,7 @@ class PoseAnalyzer:
         if not self.keypoints_history:
             return np.array([])
         
-        return np.array([kp.landmarks for kp in self.keypoints_history])
+        return self.keypoints_history.landmarks.copy()
     
     def get_average_confidence(self) -> float:
         """
@@ -294,15 +438,22 @@ class PoseAnalyzer:
         if not self.keypoints_history:
             return 0.0
         
-        confidences = [kp.confidence for kp in self.keypoints_history]
-        return np.mean(confidences)
+        return float(self.keypoints_history.confidences.mean())
     
     def reset(self):
         """Reset keypoints history for new video processing"""
         self.keypoints_history.clear()
         logger.info("PoseAnalyzer reset")
     
+    def close(self):
+        """Release the MediaPipe graph (safe to call more than once)"""
+        pose = self.__dict__.pop('pose', None)
+        if pose is not None:
+            pose.close()
+    
     def __del__(self):
         """Cleanup MediaPipe resources"""
-        if hasattr(self, 'pose'):
-            self.pose.close()
\ No newline at end of file
+        # Closing the graph during interpreter shutdown can hang; the process
+        # is exiting anyway, so only close on ordinary garbage collection
+        if not sys.is_finalizing():
+            self.close()
\ No newline at end of file
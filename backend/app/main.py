@@ -3,18 +3,22 @@ FastAPI Application - Main Entry Point (Fixed for HF Spaces)
 """
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
+import hashlib
 import logging
 import sys
 import os
 
-from .config import Config
+from .config import Config, config
 from .api.routes import router
 from .services.cleanup_service import cleanup_service
+from .services.processing_service import processing_service
+from .services.video_service import video_service
 
 # Configure logging
 logging.basicConfig(
@@ -48,6 +52,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"⚠️ Cleanup service failed to start: {e}")
     
+    # Start processing worker pool
+    try:
+        processing_service.start()
+    except Exception as e:
+        logger.error(f"⚠️ Processing pool failed to start: {e}")
+    
     logger.info("🎉 Application startup complete!")
     
     yield
@@ -58,6 +68,10 @@ async def lifespan(app: FastAPI):
         await cleanup_service.stop()
     except:
         pass
+    try:
+        processing_service.stop()
+    except:
+        pass
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -70,17 +84,27 @@ app = FastAPI(
 )
 
 # CORS Configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+if Config.ENABLE_CORS:
+    cors_origins = config.CORS_ORIGINS
+    allow_all_origins = "*" in cors_origins
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,
+        # Wildcard origins with credentials is rejected by browsers; only
+        # allow credentials for an explicit allowlist
+        allow_credentials=not allow_all_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Determine frontend path (works in all environments)
+@lru_cache(maxsize=1)
 def get_frontend_path():
     """Get the correct frontend path regardless of environment"""
+    # Explicit location (set in the Docker image) skips probing
+    if Config.FRONTEND_PATH:
+        return Path(Config.FRONTEND_PATH)
+    
     # Try multiple possible locations
     possible_paths = [
         Path(__file__).parent.parent / "frontend",  # backend/app/../frontend
@@ -89,20 +113,71 @@ def get_frontend_path():
     ]
     
     for path in possible_paths:
-        if path.exists() and path.is_dir():
+        if path.is_dir():
             logger.info(f"✅ Found frontend at: {path.resolve()}")
             return path
     
     logger.warning("⚠️ Frontend directory not found, using default")
-    return Path(__file__).parent.parent / "frontend"
+    return possible_paths[0]
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that sets a fixed Cache-Control header on every response"""
+    
+    def __init__(self, *args, cache_control: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+    
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
+
+
+def get_asset_version(path: Path) -> str:
+    """Hash frontend file names, sizes and mtimes into a short cache-busting version"""
+    digest = hashlib.sha1()
+    for file_path in sorted(path.rglob("*")):
+        if file_path.is_file():
+            stat = file_path.stat()
+            digest.update(
+                f"{file_path.relative_to(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+            )
+    return digest.hexdigest()[:12]
+
 
 static_path = get_frontend_path()
+index_html = None
+index_etag = None
 
 # Mount static files if directory exists
-if static_path.exists() and static_path.is_dir():
+if static_path.is_dir():
     try:
-        app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
-        logger.info(f"✅ Static files mounted from: {static_path}")
+        # Versioned prefix: relative module imports inherit it, so every asset
+        # under it can be cached forever and a frontend change yields a new prefix
+        asset_version = get_asset_version(static_path)
+        asset_prefix = f"/static/{asset_version}"
+        app.mount(
+            asset_prefix,
+            CachedStaticFiles(
+                directory=str(static_path),
+                cache_control="no-cache" if Config.DEBUG else "public, max-age=31536000, immutable"
+            ),
+            name="static_versioned"
+        )
+        app.mount(
+            "/static",
+            CachedStaticFiles(directory=str(static_path), cache_control="no-cache"),
+            name="static"
+        )
+        logger.info(f"✅ Static files mounted from: {static_path} (version {asset_version})")
+        
+        index_path = static_path / "index.html"
+        if index_path.exists():
+            index_html = index_path.read_text(encoding="utf-8").replace(
+                '"/static/', f'"{asset_prefix}/'
+            )
+            index_etag = f'"{asset_version}"'
     except Exception as e:
         logger.error(f"❌ Failed to mount static files: {e}")
 else:
@@ -113,14 +188,16 @@ app.include_router(router)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def home():
+async def home(request: Request):
     """Serve the main HTML page"""
     try:
-        index_path = static_path / "index.html"
-        if index_path.exists():
-            return FileResponse(index_path)
+        if index_html is not None:
+            headers = {"Cache-Control": "no-cache", "ETag": index_etag}
+            if request.headers.get("if-none-match") == index_etag:
+                return Response(status_code=304, headers=headers)
+            return HTMLResponse(content=index_html, headers=headers)
         else:
-            logger.error(f"❌ index.html not found at {index_path}")
+            logger.error(f"❌ index.html not found at {static_path / 'index.html'}")
             return HTMLResponse(
                 content="<h1>DanceDynamics</h1><p>Frontend files not found. API is available at <a href='/api/docs'>/api/docs</a></p>",
                 status_code=200
@@ -133,30 +210,33 @@ async def home():
         )
 
 
+# Process-constant part of /info, merged with the per-request fields
+_INFO_STATIC = {
+    "name": "Dance Movement Analysis API",
+    "version": "1.0.0",
+    "environment": {
+        "is_docker": Config.IS_DOCKER,
+        "is_hf_space": Config.IS_HF_SPACE,
+        "python_version": sys.version,
+        "working_dir": os.getcwd()
+    },
+    "endpoints": {
+        "upload": "/api/upload",
+        "analyze": "/api/analyze/{session_id}",
+        "download": "/api/download/{session_id}",
+        "websocket": "/ws/{session_id}",
+        "docs": "/api/docs"
+    }
+}
+
+
 @app.get("/info")
 async def root():
     """Root endpoint - API info"""
-    from app.api.dependencies import global_processor
-    
-    return {
-        "name": "Dance Movement Analysis API",
-        "version": "1.0.0",
+    return ORJSONResponse(_INFO_STATIC | {
         "status": "online",
-        "models_loaded": global_processor is not None,
-        "environment": {
-            "is_docker": Config.IS_DOCKER,
-            "is_hf_space": Config.IS_HF_SPACE,
-            "python_version": sys.version,
-            "working_dir": os.getcwd()
-        },
-        "endpoints": {
-            "upload": "/api/upload",
-            "analyze": "/api/analyze/{session_id}",
-            "download": "/api/download/{session_id}",
-            "websocket": "/ws/{session_id}",
-            "docs": "/api/docs"
-        }
-    }
+        "models_loaded": video_service.processor is not None
+    })
 
 
 def start_web_app():
@@ -177,7 +257,9 @@ def start_web_app():
             workers=1,
             log_level='info',
             access_log=True,
-            timeout_keep_alive=30
+            timeout_keep_alive=30,
+            ws_ping_interval=Config.WS_HEARTBEAT_INTERVAL,
+            ws_ping_timeout=Config.WS_PING_TIMEOUT
         )
     except Exception as e:
         logger.error(f'❌ Failed to start web application: {e}')
@@ -4,6 +4,7 @@ Business services
 
 from .session_manager import session_manager, SessionManager
 from .video_service import video_service, VideoService
+from .processing_service import processing_service, ProcessingService
 from .cleanup_service import cleanup_service, CleanupService
 
 __all__ = [
@@ -3,13 +3,16 @@ File cleanup service for managing storage
 """
 
 import asyncio
+import heapq
 import logging
-from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
 from app.config import Config
 from app.services.session_manager import session_manager
+from app.utils.file_utils import delete_files
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,10 @@ logger = logging.getLogger(__name__)
 class CleanupService:
     """Manages automatic file cleanup"""
     
+    # Files unmodified for this long when scanned are treated as finished, so
+    # their stat results are reused by later scans while the inode is unchanged
+    STAT_SETTLE_SECONDS = 300
+    
     def __init__(
         self,
         max_file_age_hours: int = 24,
@@ -34,6 +41,18 @@ class CleanupService:
         self.max_storage_bytes = max_storage_gb * 1024 * 1024 * 1024
         self.cleanup_task: Optional[asyncio.Task] = None
         self.is_running = False
+        self.on_delete: Optional[Callable[[str], None]] = None
+        
+        # Storage totals, kept up to date by writers and reconciled on each scan
+        self._stats_lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self._file_count = 0
+        
+        # path -> (inode, size, mtime) for settled files seen by the last scan,
+        # trusted only while the folder's own mtime (set on create, delete and
+        # rename) is unchanged since then
+        self._stat_cache: Dict[str, Tuple[int, int, float]] = {}
+        self._folder_mtimes: Dict[str, int] = {}
     
     async def start(self):
         """Start background cleanup task"""
@@ -72,11 +91,8 @@ class CleanupService:
         """Run cleanup operation"""
         logger.info("🧹 Starting cleanup operation...")
         
-        # Cleanup old files
-        deleted_by_age = await self._cleanup_old_files()
-        
-        # Cleanup by storage limit
-        deleted_by_size = await self._cleanup_by_storage_limit()
+        # Blocking filesystem work runs off the event loop
+        deleted_by_age, deleted_by_size = await asyncio.to_thread(self._cleanup_files)
         
         # Cleanup orphaned sessions
         cleaned_sessions = await self._cleanup_orphaned_sessions()
@@ -94,111 +110,227 @@ class CleanupService:
             "total_deleted": total
         }
     
-    async def _cleanup_old_files(self) -> int:
-        """Delete files older than max_file_age_hours"""
-        deleted_count = 0
-        cutoff_time = datetime.now() - timedelta(hours=self.max_file_age_hours)
+    def _cleanup_files(self) -> Tuple[int, int]:
+        """
+        Run the age and storage-limit passes over a single directory scan
+        
+        Returns:
+            Number of files deleted by age and by storage limit
+        """
+        files = self._scan_managed_files()
+        
+        # Cleanup old files
+        deleted_by_age, files = self._cleanup_old_files(files)
+        total_size = self._reset_totals(files)
+        
+        # Cleanup by storage limit (skipped without a pass when under the limit)
+        deleted_by_size = 0
+        if total_size > self.max_storage_bytes:
+            deleted_by_size = self._cleanup_by_storage_limit(files, total_size)
+        
+        return deleted_by_age, deleted_by_size
+    
+    def _scan_managed_files(self) -> List[Tuple[str, int, float]]:
+        """
+        Walk upload and output folders once
+        
+        In folders with no entries added or removed since the previous scan,
+        settled files whose inode matches reuse the cached size and mtime, so
+        only still-changing files are stat()ed again.
+        
+        Returns:
+            List of (path, size, mtime) for every regular file
+        """
+        files = []
+        old_cache = self._stat_cache
+        new_cache = {}
+        folder_mtimes = {}
+        settled_ts = time.time() - self.STAT_SETTLE_SECONDS
         
         for folder in [Config.UPLOAD_FOLDER, Config.OUTPUT_FOLDER]:
-            if not folder.exists():
+            folder = os.fspath(folder)
+            try:
+                folder_mtime = os.stat(folder).st_mtime_ns
+                entries = os.scandir(folder)
+            except FileNotFoundError:
                 continue
             
-            for file_path in folder.iterdir():
-                if not file_path.is_file():
-                    continue
-                
-                # Check file age
-                file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                
-                if file_mtime < cutoff_time:
-                    try:
-                        file_path.unlink()
-                        deleted_count += 1
-                        logger.info(f"🗑️  Deleted old file: {file_path.name}")
-                    except Exception as e:
-                        logger.error(f"Failed to delete {file_path.name}: {e}")
+            # Inode numbers are reused, so a changed folder is stat()ed in full
+            folder_mtimes[folder] = folder_mtime
+            cache = old_cache if self._folder_mtimes.get(folder) == folder_mtime else {}
+            
+            with entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    
+                    inode = entry.inode()
+                    cached = cache.get(entry.path)
+                    if cached is not None and cached[0] == inode:
+                        _, size, mtime = cached
+                    else:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            continue
+                        size, mtime = st.st_size, st.st_mtime
+                        if mtime >= settled_ts:
+                            files.append((entry.path, size, mtime))
+                            continue
+                    
+                    new_cache[entry.path] = (inode, size, mtime)
+                    files.append((entry.path, size, mtime))
         
-        return deleted_count
+        # Rebuilt from this scan, so deleted files drop out of the cache
+        self._stat_cache = new_cache
+        self._folder_mtimes = folder_mtimes
+        return files
     
-    async def _cleanup_by_storage_limit(self) -> int:
-        """Delete oldest files if storage exceeds limit"""
+    def _cleanup_old_files(self, files: List[Tuple[str, int, float]]) -> Tuple[int, List[Tuple[str, int, float]]]:
+        """
+        Delete files older than max_file_age_hours
+        
+        Returns:
+            Number of deleted files and the remaining (path, size, mtime) entries
+        """
         deleted_count = 0
+        remaining = []
+        victims = {}
+        cutoff_ts = time.time() - self.max_file_age_hours * 3600
         
-        # Calculate total storage
-        total_size = 0
-        file_list = []
+        for entry in files:
+            if entry[2] >= cutoff_ts:
+                remaining.append(entry)
+            else:
+                victims[entry[0]] = entry
         
-        for folder in [Config.UPLOAD_FOLDER, Config.OUTPUT_FOLDER]:
-            if not folder.exists():
-                continue
-            
-            for file_path in folder.iterdir():
-                if file_path.is_file():
-                    size = file_path.stat().st_size
-                    mtime = file_path.stat().st_mtime
-                    total_size += size
-                    file_list.append((file_path, size, mtime))
+        for file_path, error in delete_files(victims):
+            if error:
+                remaining.append(victims[file_path])
+                logger.error(f"Failed to delete {os.path.basename(file_path)}: {error}")
+            else:
+                deleted_count += 1
+                self._notify_deleted(file_path)
+                logger.info(f"🗑️  Deleted old file: {os.path.basename(file_path)}")
+        
+        return deleted_count, remaining
+    
+    def _cleanup_by_storage_limit(self, files: List[Tuple[str, int, float]], total_size: Optional[int] = None) -> int:
+        """Delete oldest files if storage exceeds limit"""
+        deleted_count = 0
+        if total_size is None:
+            total_size = sum(size for _, size, _ in files)
         
         # Check if over limit
         if total_size <= self.max_storage_bytes:
             return 0
         
-        # Sort by modification time (oldest first)
-        file_list.sort(key=lambda x: x[2])
+        # Heapify by modification time and pop only the oldest files needed
+        # to get under the limit, instead of sorting every file
+        heap = [(mtime, size, file_path) for file_path, size, mtime in files]
+        heapq.heapify(heap)
         
-        # Delete oldest files until under limit
-        for file_path, size, _ in file_list:
-            if total_size <= self.max_storage_bytes:
-                break
-            
-            try:
-                file_path.unlink()
-                total_size -= size
+        victims = {}
+        while heap and total_size > self.max_storage_bytes:
+            _, size, file_path = heapq.heappop(heap)
+            victims[file_path] = size
+            total_size -= size
+        
+        for file_path, error in delete_files(victims):
+            if error:
+                logger.error(f"Failed to delete {os.path.basename(file_path)}: {error}")
+            else:
                 deleted_count += 1
-                logger.info(f"🗑️  Deleted for storage: {file_path.name}")
-            except Exception as e:
-                logger.error(f"Failed to delete {file_path.name}: {e}")
+                self.track_removed(victims[file_path])
+                self._notify_deleted(file_path)
+                logger.info(f"🗑️  Deleted for storage: {os.path.basename(file_path)}")
         
         return deleted_count
     
+    def _notify_deleted(self, file_path: str):
+        """Let the on_delete hook drop state held for a deleted file"""
+        if not self.on_delete:
+            return
+        try:
+            self.on_delete(file_path)
+        except Exception as e:
+            logger.error(f"Delete hook failed for {os.path.basename(file_path)}: {e}")
+    
     async def _cleanup_orphaned_sessions(self) -> int:
         """Remove sessions with missing files or old failed sessions"""
-        cleaned_count = 0
+        cleaned_count = session_manager.evict_expired()
+        
+        # Files of sessions evicted here or by lookups are deleted off the loop
+        await asyncio.to_thread(session_manager.cleanup_evicted)
+        if not session_manager.sessions:
+            return cleaned_count
+        
         sessions_to_remove = []
+        upload_paths = []
+        failed_cutoff_ts = time.time() - 3600
         
-        for session_id, session in session_manager.sessions.items():
+        # Snapshot on the event loop so concurrent create/update calls
+        # cannot change the dict while it is being iterated
+        for session_id, session in list(session_manager.sessions.items()):
             # Remove failed sessions older than 1 hour
             if session.get("status") == "failed":
-                upload_time = datetime.fromisoformat(session["upload_time"])
-                if datetime.now() - upload_time > timedelta(hours=1):
+                if session["upload_time_ts"] < failed_cutoff_ts:
                     sessions_to_remove.append(session_id)
                     continue
             
-            # Remove sessions with missing files
             upload_path = session.get("upload_path")
-            if upload_path and not Path(upload_path).exists():
-                sessions_to_remove.append(session_id)
+            if upload_path:
+                upload_paths.append((session_id, upload_path))
+        
+        # Remove sessions with missing files (existence checks run in a thread)
+        missing = await asyncio.to_thread(
+            lambda: [sid for sid, path in upload_paths if not os.path.lexists(path)]
+        )
+        sessions_to_remove.extend(missing)
         
         for session_id in sessions_to_remove:
-            session_manager.delete_session(session_id)
-            cleaned_count += 1
-            logger.info(f"🗑️  Cleaned orphaned session: {session_id}")
+            # May already be gone if deleted while the checks were running
+            if session_manager.delete_session(session_id):
+                cleaned_count += 1
+                logger.info(f"🗑️  Cleaned orphaned session: {session_id}")
         
         return cleaned_count
     
+    def track_added(self, size: int, count: int = 1):
+        """Record files written to the managed folders"""
+        with self._stats_lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+                self._file_count += count
+    
+    def track_removed(self, size: int, count: int = 1):
+        """Record files deleted from the managed folders"""
+        with self._stats_lock:
+            if self._total_bytes is not None:
+                self._total_bytes = max(0, self._total_bytes - size)
+                self._file_count = max(0, self._file_count - count)
+    
+    def _reset_totals(self, files: List[Tuple[str, int, float]]) -> int:
+        """Reconcile storage totals with a fresh scan, returning the total bytes"""
+        total_size = sum(size for _, size, _ in files)
+        with self._stats_lock:
+            self._total_bytes = total_size
+            self._file_count = len(files)
+        return total_size
+    
     def get_storage_stats(self) -> dict:
-        """Get current storage statistics"""
-        total_size = 0
-        file_count = 0
+        """
+        Get current storage statistics
         
-        for folder in [Config.UPLOAD_FOLDER, Config.OUTPUT_FOLDER]:
-            if not folder.exists():
-                continue
-            
-            for file_path in folder.iterdir():
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-                    file_count += 1
+        Totals are tracked incrementally; the folders are only scanned if no
+        cleanup pass has run yet to establish them.
+        """
+        if self._total_bytes is None:
+            self._reset_totals(self._scan_managed_files())
+        
+        with self._stats_lock:
+            total_size = self._total_bytes
+            file_count = self._file_count
         
         return {
             "total_size_bytes": total_size,
@@ -0,0 +1,210 @@
+"""
+Video processing service - runs analysis jobs in a worker process pool
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Progress relay throttle: at most one update per interval, and only once
+# progress has advanced by at least the minimum step
+PROGRESS_MIN_INTERVAL = 0.5
+PROGRESS_MIN_STEP = 0.01
+
+# Per-worker state, populated once by _init_worker in each pool process
+_processor = None
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    """Load the VideoProcessor (and MediaPipe model) once per worker process"""
+    global _processor, _progress_queue
+    from app.core.video_processor import VideoProcessor
+
+    _progress_queue = progress_queue
+    _processor = VideoProcessor()
+
+
+def _warm_up():
+    """No-op job used to start a worker (and load its model) ahead of real work"""
+    return None
+
+
+def _run_job(session_id: str, input_path: str, output_path: str) -> Dict[str, Any]:
+    """Process a video inside a worker process, forwarding progress to the parent"""
+    last_sent_time = 0.0
+    last_sent_progress = -1.0
+
+    def progress_callback(progress: float, message: str):
+        """Throttled progress callback - coalesce per-frame updates"""
+        nonlocal last_sent_time, last_sent_progress
+
+        now = time.monotonic()
+        if progress < 1.0 and (
+            now - last_sent_time < PROGRESS_MIN_INTERVAL
+            or progress - last_sent_progress < PROGRESS_MIN_STEP
+        ):
+            return
+
+        last_sent_time, last_sent_progress = now, progress
+        _progress_queue.put((session_id, progress, message))
+
+    return _processor.process_video(
+        Path(input_path),
+        Path(output_path),
+        progress_callback
+    )
+
+
+class ProcessingService:
+    """Runs video processing off the event loop in separate processes"""
+
+    def __init__(self, max_workers: int = Config.MAX_WORKERS):
+        """
+        Args:
+            max_workers: Number of worker processes (each loads its own model)
+        """
+        self.max_workers = max_workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.progress_queue = None
+        self.relay_thread: Optional[threading.Thread] = None
+        self.progress_callbacks: Dict[str, Tuple[asyncio.AbstractEventLoop, Callable]] = {}
+
+    def start(self):
+        """Create the worker pool and the progress relay thread"""
+        if self.executor is not None:
+            return
+
+        # Spawn rather than fork: the parent already runs MediaPipe graph threads
+        self.progress_queue = multiprocessing.get_context("spawn").Queue()
+        self.executor = self._create_executor()
+
+        self.relay_thread = threading.Thread(
+            target=self._relay_progress,
+            name="progress-relay",
+            daemon=True
+        )
+        self.relay_thread.start()
+
+        logger.info(f"✅ Processing pool started ({self.max_workers} workers)")
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Create a warmed-up worker pool sharing the progress queue"""
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.progress_queue,)
+        )
+
+        # Workers are spawned on demand; submit one no-op per worker so every
+        # process loads its model now instead of during the first real job
+        for _ in range(self.max_workers):
+            executor.submit(_warm_up)
+
+        return executor
+
+    def _restart_executor(self, broken: ProcessPoolExecutor):
+        """Replace a broken pool, unless a concurrent job already has"""
+        if self.executor is not broken:
+            return
+
+        logger.error("Processing pool broken (worker died); restarting workers")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._create_executor()
+
+    async def _run_in_pool(self, fn: Callable, *args) -> Any:
+        """
+        Run a function in the worker pool, recovering from a dead worker
+
+        If a worker dies (segfault, OOM kill) the pool breaks; it is replaced
+        and the job retried once on the fresh pool before the error surfaces.
+        """
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(2):
+            executor = self.executor
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                self._restart_executor(executor)
+                if attempt:
+                    raise
+
+    def stop(self):
+        """Shut down the worker pool and the progress relay thread"""
+        if self.executor is None:
+            return
+
+        self.progress_queue.put(None)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None
+        self.relay_thread = None
+        logger.info("🛑 Processing pool stopped")
+
+    def _relay_progress(self):
+        """Forward worker progress messages to the registered async callbacks"""
+        while True:
+            item = self.progress_queue.get()
+            if item is None:
+                break
+
+            session_id, progress, message = item
+            entry = self.progress_callbacks.get(session_id)
+            if entry is None:
+                continue
+
+            loop, callback = entry
+            try:
+                asyncio.run_coroutine_threadsafe(callback(progress, message), loop)
+            except RuntimeError as e:
+                logger.debug(f"Dropped progress update for {session_id}: {e}")
+
+    async def process_video(
+        self,
+        session_id: str,
+        input_path: Path,
+        output_path: Path,
+        progress_callback: Optional[Callable[[float, str], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a video in the worker pool
+
+        Args:
+            session_id: Session the job belongs to
+            input_path: Input video path
+            output_path: Output video path
+            progress_callback: Optional async callback (progress, message)
+
+        Returns:
+            Processing results from VideoProcessor.process_video
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+
+        if progress_callback:
+            self.progress_callbacks[session_id] = (loop, progress_callback)
+
+        try:
+            return await self._run_in_pool(
+                _run_job,
+                session_id,
+                str(input_path),
+                str(output_path)
+            )
+        finally:
+            self.progress_callbacks.pop(session_id, None)
+
+
+# Global processing service instance
+processing_service = ProcessingService()
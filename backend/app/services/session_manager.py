@@ -2,18 +2,40 @@
 Session management service
 """
 
-from typing import Dict, Any, Optional
-from datetime import datetime
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Any, Optional, Callable
+import time
 import logging
 
+from app.config import Config
+from app.utils.helpers import iso_timestamp
+
 logger = logging.getLogger(__name__)
 
 
 class SessionManager:
     """Manages processing sessions"""
     
-    def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+    # Session fields exposed by list_sessions
+    SUMMARY_FIELDS = ("filename", "status", "upload_time")
+    
+    def __init__(
+        self,
+        max_sessions: int = Config.MAX_STORED_SESSIONS,
+        ttl_seconds: int = Config.SESSION_TIMEOUT
+    ):
+        """
+        Args:
+            max_sessions: Maximum sessions kept before evicting least recently used
+            ttl_seconds: Evict sessions not accessed for this many seconds
+        """
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.on_evict: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._evicted: Deque[Dict[str, Any]] = deque()
+        self._last_access: Dict[str, float] = {}
+        self._summary_cache: Optional[list] = None
     
     def create_session(self, session_id: str, filename: str, upload_path: str, video_info: Dict) -> Dict[str, Any]:
         """Create a new session"""
@@ -21,26 +43,41 @@ class SessionManager:
             "session_id": session_id,
             "filename": filename,
             "upload_path": upload_path,
-            "upload_time": datetime.now().isoformat(),
+            "upload_time": iso_timestamp(),
+            "upload_time_ts": time.time(),
             "status": "uploaded",
             "video_info": video_info,
-            "results": None,
             "progress": 0.0,
             "message": ""
         }
         
         self.sessions[session_id] = session
+        self._summary_cache = None
+        self._touch(session_id)
+        self.evict_expired()
         logger.info(f"Created session: {session_id}")
         return session
     
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session by ID"""
-        return self.sessions.get(session_id)
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        
+        if self._is_expired(session_id, time.monotonic()) and session["status"] != "processing":
+            self._evict(session_id)
+            return None
+        
+        self._touch(session_id)
+        return session
     
     def update_session(self, session_id: str, updates: Dict[str, Any]) -> bool:
         """Update session data"""
         if session_id in self.sessions:
             self.sessions[session_id].update(updates)
+            if self._summary_cache is not None and not updates.keys().isdisjoint(self.SUMMARY_FIELDS):
+                self._summary_cache = None
+            self._touch(session_id)
             return True
         return False
     
@@ -48,21 +85,96 @@ class SessionManager:
         """Delete a session"""
         if session_id in self.sessions:
             del self.sessions[session_id]
+            self._last_access.pop(session_id, None)
+            self._summary_cache = None
             logger.info(f"Deleted session: {session_id}")
             return True
         return False
     
+    def evict_expired(self) -> int:
+        """
+        Evict idle sessions past the TTL and least recently used sessions
+        beyond max_sessions. Sessions still processing are never evicted.
+        
+        Returns:
+            Number of sessions evicted
+        """
+        now = time.monotonic()
+        evicted = 0
+        
+        # Oldest access first, so stop at the first fresh session once within bounds
+        for session_id in list(self.sessions):
+            over_limit = len(self.sessions) > self.max_sessions
+            if not over_limit and not self._is_expired(session_id, now):
+                break
+            if self.sessions[session_id]["status"] == "processing":
+                continue
+            self._evict(session_id)
+            evicted += 1
+        
+        return evicted
+    
+    def _touch(self, session_id: str):
+        """Mark session as most recently used"""
+        # Moving a session reorders the summary, so only a real move invalidates it
+        if next(reversed(self.sessions)) != session_id:
+            self.sessions.move_to_end(session_id)
+            self._summary_cache = None
+        self._last_access[session_id] = time.monotonic()
+    
+    def _is_expired(self, session_id: str, now: float) -> bool:
+        """Check whether session has been idle longer than the TTL"""
+        return now - self._last_access.get(session_id, now) > self.ttl_seconds
+    
+    def _evict(self, session_id: str):
+        """Remove session and queue it for file cleanup (no file I/O here)"""
+        session = self.sessions.pop(session_id)
+        session["status"] = "expired"
+        self._last_access.pop(session_id, None)
+        self._summary_cache = None
+        self._evicted.append(session)
+        logger.info(f"Evicted session: {session_id}")
+    
+    def cleanup_evicted(self) -> int:
+        """
+        Run the eviction hook for every queued evicted session
+        
+        Blocking (the hook deletes files); call it from a worker thread.
+        
+        Returns:
+            Number of evicted sessions cleaned up
+        """
+        cleaned = 0
+        while self._evicted:
+            session = self._evicted.popleft()
+            cleaned += 1
+            if not self.on_evict:
+                continue
+            try:
+                self.on_evict(session)
+            except Exception as e:
+                logger.error(f"Eviction hook failed for {session['session_id']}: {e}")
+        return cleaned
+    
     def list_sessions(self) -> list:
-        """List all sessions"""
-        return [
-            {
-                "session_id": sid,
-                "filename": s["filename"],
-                "status": s["status"],
-                "upload_time": s["upload_time"]
-            }
-            for sid, s in self.sessions.items()
-        ]
+        """
+        List all sessions
+        
+        The summary is cached and only rebuilt after sessions are added,
+        removed, reordered, or have a summary field changed. Each call returns
+        a new list, but the entries are shared; treat them as read-only.
+        """
+        if self._summary_cache is None:
+            self._summary_cache = [
+                {
+                    "session_id": sid,
+                    "filename": s["filename"],
+                    "status": s["status"],
+                    "upload_time": s["upload_time"]
+                }
+                for sid, s in self.sessions.items()
+            ]
+        return list(self._summary_cache)
     
     def get_active_count(self) -> int:
         """Get count of active sessions"""
@@ -70,4 +182,4 @@ class SessionManager:
 
 
 # Global session manager instance
-session_manager = SessionManager()
\ No newline at end of file
+session_manager = SessionManager()
@@ -2,13 +2,19 @@
 Video handling service
 """
 
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
+import io
+import mmap
+import os
 import shutil
 import logging
 
 from app.config import Config
-from app.utils.file_utils import validate_file_extension, format_file_size
+from app.services.cleanup_service import cleanup_service
+from app.services.session_manager import session_manager
+from app.utils.file_utils import validate_file_extension, format_file_size, delete_files
 from app.core.video_processor import VideoProcessor
 
 logger = logging.getLogger(__name__)
@@ -17,8 +23,12 @@ logger = logging.getLogger(__name__)
 class VideoService:
     """Handles video upload and validation"""
     
+    # Maximum number of processed videos kept memory-mapped for downloads
+    MAX_MAPPED_OUTPUTS = 8
+    
     def __init__(self):
         self.processor: Optional[VideoProcessor] = None
+        self._output_mmaps: "OrderedDict[str, mmap.mmap]" = OrderedDict()
     
     def get_processor(self) -> VideoProcessor:
         """Get or create VideoProcessor instance"""
@@ -30,20 +40,58 @@ class VideoService:
     
     def validate_video(self, filename: str) -> dict:
         """Validate video file"""
-        from typing import List
-        allowed_extensions: List[str] = [".mp4", ".avi", ".mov", ".mkv", ".webm"]
-        return validate_file_extension(filename, allowed_extensions)
+        return validate_file_extension(filename)
     
     def save_upload(self, file, session_id: str, filename: str) -> Path:
         """Save uploaded file"""
         upload_path = Config.UPLOAD_FOLDER / f"{session_id}_{filename}"
         
         with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+            self._copy_upload(file.file, buffer)
+            cleanup_service.track_added(os.fstat(buffer.fileno()).st_size)
         
         logger.info(f"Saved upload: {upload_path.name}")
         return upload_path
     
+    @staticmethod
+    def _copy_upload(src, dst):
+        """
+        Copy an upload into the destination file
+        
+        Uploads with a file descriptor are copied inside the kernel with
+        copy_file_range (a spool still in memory rolls over to disk on
+        fileno(), which is bounded by its small max_size); sources without
+        one and platforms without copy_file_range fall back to a 1 MiB
+        buffered copy.
+        """
+        copy_file_range = getattr(os, "copy_file_range", None)
+        src.seek(0)
+        
+        src_fd = None
+        if copy_file_range:
+            try:
+                src_fd = src.fileno()
+            except (AttributeError, io.UnsupportedOperation):
+                pass
+        
+        if src_fd is not None:
+            try:
+                dst_fd = dst.fileno()
+                remaining = os.fstat(src_fd).st_size
+                while remaining > 0:
+                    copied = copy_file_range(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except (OSError, ValueError):
+                # Unsupported fd type or filesystem: restart with a plain copy
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+    
     def load_video_info(self, upload_path: Path) -> dict:
         """Load video metadata"""
         processor = self.get_processor()
@@ -58,18 +106,61 @@ class VideoService:
             "frame_count": video_info["frame_count"]
         }
     
+    def get_output_mmap(self, output_path: Path) -> mmap.mmap:
+        """
+        Get a read-only memory map of a processed video
+        
+        The map is shared by concurrent downloads of the same file, so the
+        kernel serves them from one set of page-cache pages.
+        """
+        key = str(output_path)
+        mm = self._output_mmaps.get(key)
+        
+        if mm is not None and not mm.closed and len(mm) == output_path.stat().st_size:
+            self._output_mmaps.move_to_end(key)
+            return mm
+        
+        with open(output_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        self._output_mmaps[key] = mm
+        if len(self._output_mmaps) > self.MAX_MAPPED_OUTPUTS:
+            # Drop the reference only; in-flight downloads keep the map alive
+            self._output_mmaps.popitem(last=False)
+        
+        return mm
+    
+    def release_output_mmap(self, output_path: str):
+        """Forget a processed video's map; it is unmapped once in-flight downloads finish"""
+        # Not closed here: download streams may still be slicing the shared map
+        self._output_mmaps.pop(str(output_path), None)
+    
     def cleanup_session_files(self, session: dict):
         """Delete session files"""
-        try:
-            if "upload_path" in session:
-                Path(session["upload_path"]).unlink(missing_ok=True)
-            if "output_path" in session:
-                Path(session["output_path"]).unlink(missing_ok=True)
-            if "results_path" in session:
-                Path(session["results_path"]).unlink(missing_ok=True)
-        except Exception as e:
-            logger.error(f"Error deleting files: {e}")
+        if "output_path" in session:
+            self.release_output_mmap(session["output_path"])
+        
+        victims = {}
+        for key in ("upload_path", "output_path", "results_path"):
+            path = session.get(key)
+            if path:
+                try:
+                    victims[str(path)] = os.stat(path).st_size
+                except OSError:
+                    continue
+        
+        for path, error in delete_files(victims):
+            if error:
+                logger.error(f"Error deleting {Path(path).name}: {error}")
+            else:
+                cleanup_service.track_removed(victims[path])
 
 
 # Global video service instance
-video_service = VideoService()
\ No newline at end of file
+video_service = VideoService()
+
+# Delete files of sessions evicted from the bounded session store
+session_manager.on_evict = video_service.cleanup_session_files
+
+# Drop maps of outputs removed by the age and storage cleanup passes
+cleanup_service.on_delete = video_service.release_output_mmap
\ No newline at end of file
@@ -7,16 +7,20 @@ from .file_utils import (
     validate_file_extension,
     validate_file_size,
     format_file_size,
+    delete_files,
     cleanup_old_files
 )
 
 from .validation import (
     safe_divide,
-    calculate_percentage
+    safe_divide_arr,
+    calculate_percentage,
+    calculate_percentage_arr
 )
 
 from .helpers import (
     timing_decorator,
+    iso_timestamp,
     create_success_response,
     create_error_response
 )
@@ -27,14 +31,18 @@ __all__ = [
     'validate_file_extension',
     'validate_file_size',
     'format_file_size',
+    'delete_files',
     'cleanup_old_files',
     
     # Validation
     'safe_divide',
+    'safe_divide_arr',
     'calculate_percentage',
+    'calculate_percentage_arr',
     
     # Helpers
     'timing_decorator',
+    'iso_timestamp',
     'create_success_response',
     'create_error_response'
 ]
\ No newline at end of file
@@ -2,35 +2,54 @@
 File handling utilities
 """
 
+import logging
 import os
-import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for overlapping unlink() calls; threads are started on demand
+_delete_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="unlink")
+
 
 def generate_session_id() -> str:
-    """Generate unique session ID for tracking"""
-    return str(uuid.uuid4())
+    """Generate unique session ID for tracking (128 random bits, hex encoded)"""
+    return os.urandom(16).hex()
+
 
+# Default video extensions accepted for upload
+_DEFAULT_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+_ALLOWED_EXT = frozenset(_DEFAULT_EXTENSIONS)
+_ALLOWED_STR = ", ".join(_DEFAULT_EXTENSIONS)
 
-def validate_file_extension(filename: str, allowed_extensions: List[str] = [".mp4", ".avi", ".mov", ".mkv", ".webm"]) -> Dict:
+
+def validate_file_extension(filename: str, allowed_extensions: Iterable[str] = _ALLOWED_EXT) -> Dict:
     """
     Validate if file has allowed extension
     
     Args:
         filename: Name of the file
-        allowed_extensions: List of allowed extensions (e.g., ['.mp4', '.avi'])
+        allowed_extensions: Allowed extensions (e.g., {'.mp4', '.avi'})
     
     Returns:
         Dict with valid status and error message
     """
-    ext = Path(filename).suffix.lower()
+    # Same result as Path(filename).suffix without building a PurePath
+    name = filename.rpartition("/")[2]
+    i = name.rfind(".")
+    ext = name[i:].lower() if 0 < i < len(name) - 1 else ""
+    
     if ext in allowed_extensions:
         return {"valid": True, "error": ""}
-    else:
-        return {"valid": False, "error": f"Invalid file extension: {ext}. Allowed extensions are {', '.join(allowed_extensions)}."}
+    
+    allowed_str = _ALLOWED_STR if allowed_extensions is _ALLOWED_EXT else ", ".join(allowed_extensions)
+    return {"valid": False, "error": f"Invalid file extension: {ext}. Allowed extensions are {allowed_str}."}
 
 
-def validate_file_size(file_path: Path, max_size_bytes: int) -> bool:
+def validate_file_size(file_path: Union[str, os.PathLike], max_size_bytes: int) -> bool:
     """
     Validate if file size is within limit
     
@@ -41,9 +60,14 @@ def validate_file_size(file_path: Path, max_size_bytes: int) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    if not file_path.exists():
+    # One stat call covers both the existence and the size check
+    try:
+        return os.stat(file_path).st_size <= max_size_bytes
+    except (FileNotFoundError, NotADirectoryError):
         return False
-    return file_path.stat().st_size <= max_size_bytes
+
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 
 def format_file_size(size_bytes: int) -> str:
@@ -56,11 +80,40 @@ def format_file_size(size_bytes: int) -> str:
     Returns:
         Formatted string (e.g., "10.5 MB")
     """
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} B"
+    
+    # Each unit is 10 more bits, so the bit length picks the unit directly
+    unit_idx = min((int(size_bytes).bit_length() - 1) // 10, 4)
+    return f"{size_bytes / (1 << (10 * unit_idx)):.1f} {_SIZE_UNITS[unit_idx]}"
+
+
+def _unlink(path) -> Optional[Exception]:
+    """Delete one file, returning the error instead of raising"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        return e
+    return None
+
+
+def delete_files(paths: Iterable) -> List[Tuple[str, Optional[Exception]]]:
+    """
+    Delete several files concurrently
+    
+    Args:
+        paths: Files to delete (missing files count as deleted)
+    
+    Returns:
+        List of (path, error) in input order; error is None on success
+    """
+    paths = [str(p) for p in paths]
+    if len(paths) <= 1:
+        return [(p, _unlink(p)) for p in paths]
+    
+    return list(zip(paths, _delete_executor.map(_unlink, paths)))
 
 
 def cleanup_old_files(directory: Path, max_age_hours: int = 24):
@@ -71,23 +124,24 @@ def cleanup_old_files(directory: Path, max_age_hours: int = 24):
         directory: Directory to clean
         max_age_hours: Maximum file age in hours
     """
-    import time
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    
     if not directory.exists():
         return
     
-    current_time = time.time()
-    max_age_seconds = max_age_hours * 3600
-    
-    for file_path in directory.iterdir():
-        if file_path.is_file():
-            file_age = current_time - file_path.stat().st_mtime
-            if file_age > max_age_seconds:
-                try:
-                    file_path.unlink()
-                    logger.info(f"Deleted old file: {file_path.name}")
-                except Exception as e:
-                    logger.error(f"Error deleting {file_path.name}: {e}")
\ No newline at end of file
+    cutoff_ts = time.time() - max_age_hours * 3600
+    
+    victims = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff_ts:
+                victims.append(entry.path)
+    
+    # Delete expired files as one concurrent batch; log successes once
+    deleted_count = 0
+    for file_path, error in delete_files(victims):
+        if error:
+            logger.error(f"Error deleting {os.path.basename(file_path)}: {error}")
+        else:
+            deleted_count += 1
+    
+    if deleted_count:
+        logger.info("Deleted %d old files from %s", deleted_count, directory)
\ No newline at end of file
@@ -7,6 +7,7 @@ import logging
 from functools import wraps
 from typing import Any, Dict, Optional
 import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -17,15 +18,35 @@ def timing_decorator(func):
     """
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        # Skip timing entirely when the message would be discarded
+        if not logger.isEnabledFor(logging.INFO):
+            return func(*args, **kwargs)
+        
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        execution_time = end_time - start_time
-        logger.info(f"{func.__name__} executed in {execution_time:.2f} seconds")
+        execution_time = (time.perf_counter_ns() - start_ns) * 1e-9
+        logger.info("%s executed in %.2f seconds", func.__name__, execution_time)
         return result
     return wrapper
 
 
+_timestamp_cache = (0, "")
+
+
+def iso_timestamp() -> str:
+    """
+    Current local time as an ISO 8601 string (second resolution)
+    
+    The formatted string is cached per second, so hot paths cost a single
+    time.time() call instead of building and formatting a datetime
+    """
+    global _timestamp_cache
+    now = int(time.time())
+    if _timestamp_cache[0] != now:
+        _timestamp_cache = (now, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)))
+    return _timestamp_cache[1]
+
+
 def create_success_response(data: Any, message: str = "Success") -> Dict[str, Any]:
     """
     Create standardized success response
@@ -40,30 +61,49 @@ def create_success_response(data: Any, message: str = "Success") -> Dict[str, An
 def create_error_response(error: str, details: Optional[str] = None) -> Dict[str, Any]:
     """
     Create standardized error response
+    
+    "details" is always present (None when not given) so every error
+    response has the same shape.
     """
-    response = {
+    return {
         "status": "error",
-        "error": error
+        "error": error,
+        "details": details or None
     }
-    if details:
-        response["details"] = details
-    return response
 
-def convert_numpy_types(obj):
+
+# Exact-type converters for values orjson cannot encode natively
+# (e.g. non-contiguous arrays, float16); ndarray.tolist() emits Python scalars
+_JSON_CONVERTERS = {np.ndarray: np.ndarray.tolist}
+_JSON_CONVERTERS.update({t: np.generic.item for t in set(np.sctypeDict.values())})
+
+
+def _json_default(obj: Any) -> Any:
+    """Fallback for values orjson cannot encode natively"""
+    converter = _JSON_CONVERTERS.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+    
+    # Subclasses miss the exact-type table
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+def to_json_bytes(obj: Any, indent: bool = False) -> bytes:
     """
-    Recursively convert numpy types to native Python types for JSON serialization
+    Serialize to JSON bytes, encoding numpy arrays and scalars natively in C
+    
+    Args:
+        obj: Object to serialize (dicts may have non-string keys)
+        indent: Pretty-print with two-space indentation
+    
+    Returns:
+        UTF-8 encoded JSON
     """
-    if isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, (np.int_, np.intc, np.intp, np.int8, np.int16, np.int32, np.int64)):
-        return int(obj)
-    elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [convert_numpy_types(item) for item in obj]
-    else:
-        return obj
\ No newline at end of file
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=_json_default, option=option)
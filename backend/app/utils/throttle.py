@@ -2,12 +2,19 @@
 Progress throttling utility
 """
 
+import asyncio
 import time
-from typing import Callable, Optional
+from bisect import bisect_right
+from typing import Callable, Optional, Tuple
 
 
 class ProgressThrottler:
-    """Throttles progress updates to reduce message frequency"""
+    """
+    Throttles progress updates to reduce message frequency
+    
+    Updates arriving inside the interval are coalesced rather than lost: the
+    latest one is sent when the interval ends.
+    """
     
     def __init__(
         self,
@@ -24,29 +31,84 @@ class ProgressThrottler:
         self.callback = callback
         self.min_interval = min_interval
         self.key_milestones = set(key_milestones)
-        self.last_update_time = 0
         self.last_progress = -1
+        
+        # Integer nanoseconds / percent so the drop path is a single int compare
+        self._min_interval_ns = int(min_interval * 1e9)
+        self._milestones_int = tuple(sorted({int(round(m * 100)) for m in key_milestones}))
+        self._last_milestone_idx = -1
+        self._last_ns = -self._min_interval_ns
+        self._last_p100 = -1
+        self._pending: Optional[Tuple[float, str]] = None
+        self._flush_task: Optional[asyncio.Task] = None
     
     async def update(self, progress: float, message: str):
         """
         Send progress update only if:
-        1. It's a key milestone (0%, 30%, 50%, 70%, 90%, 100%), OR
+        1. It reaches or skips past a key milestone (0%, 30%, 50%, 70%, 90%,
+           100%) for the first time, OR
         2. Enough time has passed since last update
-        """
-        current_time = time.time()
         
-        # Round progress to 2 decimals for milestone comparison
-        progress_rounded = round(progress, 2)
+        Otherwise the update is held and sent (if still the latest) once the
+        interval has elapsed.
+        """
+        now = time.monotonic_ns()
+        p100 = round(progress * 100)
         
-        # Always send key milestones
-        if progress_rounded in self.key_milestones:
-            await self.callback(progress, message)
-            self.last_update_time = current_time
-            self.last_progress = progress
+        if p100 == self._last_p100 and now - self._last_ns < self._min_interval_ns:
+            self._hold(progress, message)
             return
         
-        # Send if enough time passed
-        if current_time - self.last_update_time >= self.min_interval:
-            await self.callback(progress, message)
-            self.last_update_time = current_time
-            self.last_progress = progress
\ No newline at end of file
+        self._last_p100 = p100
+        
+        # Always send the first update at or past each milestone, otherwise rate-limit
+        milestone_idx = bisect_right(self._milestones_int, p100) - 1
+        crossed_milestone = milestone_idx > self._last_milestone_idx
+        if crossed_milestone:
+            self._last_milestone_idx = milestone_idx
+        
+        if crossed_milestone or now - self._last_ns >= self._min_interval_ns:
+            self._pending = None
+            await self._send(progress, message, now)
+        else:
+            self._hold(progress, message)
+    
+    async def close(self, flush: bool = True):
+        """
+        Stop the pending flush timer
+        
+        Args:
+            flush: Send the held update (if any) immediately
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        if flush and self._pending is not None:
+            progress, message = self._pending
+            self._pending = None
+            await self._send(progress, message, time.monotonic_ns())
+    
+    def _hold(self, progress: float, message: str):
+        """Keep the latest update and make sure a flush is scheduled"""
+        self._pending = (progress, message)
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        """Send the held update when the current interval ends"""
+        delay_ns = self._last_ns + self._min_interval_ns - time.monotonic_ns()
+        if delay_ns > 0:
+            await asyncio.sleep(delay_ns / 1e9)
+        
+        self._flush_task = None
+        if self._pending is not None:
+            progress, message = self._pending
+            self._pending = None
+            await self._send(progress, message, time.monotonic_ns())
+    
+    async def _send(self, progress: float, message: str, now: int):
+        """Invoke the callback and record the send"""
+        self._last_ns = now
+        self.last_progress = progress
+        await self.callback(progress, message)
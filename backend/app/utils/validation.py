@@ -4,6 +4,8 @@ Data validation utilities
 
 from typing import Optional
 
+import numpy as np
+
 
 def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> float:
     """
@@ -20,6 +22,25 @@ def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> f
     return numerator / denominator if denominator != 0 else default
 
 
+def safe_divide_arr(numerators: np.ndarray, denominators: np.ndarray,
+                    default: float = 0.0) -> np.ndarray:
+    """
+    Vectorized safe_divide over arrays
+    
+    Args:
+        numerators: Values to divide
+        denominators: Values to divide by (broadcastable against numerators)
+        default: Value used where the denominator is zero
+    
+    Returns:
+        Float array of quotients, default where the denominator is zero
+    """
+    numerators = np.asarray(numerators, dtype=np.float64)
+    denominators = np.asarray(denominators, dtype=np.float64)
+    shape = np.broadcast_shapes(numerators.shape, denominators.shape)
+    return np.divide(numerators, denominators, out=np.full(shape, default), where=denominators != 0)
+
+
 def calculate_percentage(part: float, whole: float) -> float:
     """
     Calculate percentage with safe division
@@ -31,4 +52,21 @@ def calculate_percentage(part: float, whole: float) -> float:
     Returns:
         Percentage (0-100)
     """
-    return safe_divide(part * 100, whole, 0.0)
\ No newline at end of file
+    return part * 100.0 / whole if whole != 0 else 0.0
+
+
+def calculate_percentage_arr(parts: np.ndarray, wholes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized calculate_percentage over arrays
+    
+    Args:
+        parts: Part values
+        wholes: Whole values (broadcastable against parts)
+    
+    Returns:
+        Float array of percentages, 0.0 where the whole is zero
+    """
+    parts = np.asarray(parts, dtype=np.float64)
+    wholes = np.asarray(wholes, dtype=np.float64)
+    shape = np.broadcast_shapes(parts.shape, wholes.shape)
+    return np.divide(parts * 100.0, wholes, out=np.zeros(shape), where=wholes != 0)
@@ -8,7 +8,41 @@ import sys
 import os
 from pathlib import Path
 import time
-import json
+import io
+
+import orjson
+from contextlib import redirect_stdout, redirect_stderr
+
+
+# (result key, test file, description) for each pytest suite
+UNIT_SUITES = [
+    ('pose_analyzer_tests', "tests/test_pose_analyzer.py", "Pose Analyzer Tests"),
+    ('movement_classifier_tests', "tests/test_movement_classifier.py", "Movement Classifier Tests"),
+]
+API_SUITE = ('api_tests', "tests/test_api.py", "API Endpoint Tests")
+INTEGRATION_SUITE = ('integration_tests', "tests/test_integration.py", "Integration Tests")
+
+
+class SuiteReporter:
+    """pytest plugin recording which test files ran and which had failures"""
+    
+    def __init__(self):
+        self.ran = set()
+        self.failed = set()
+    
+    @staticmethod
+    def _file_name(nodeid):
+        return nodeid.split("::")[0].rsplit("/", 1)[-1]
+    
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.failed.add(self._file_name(report.nodeid))
+    
+    def pytest_runtest_logreport(self, report):
+        name = self._file_name(report.nodeid)
+        self.ran.add(name)
+        if report.failed:
+            self.failed.add(name)
 
 
 class TestRunner:
@@ -71,49 +105,72 @@ class TestRunner:
                 'stderr': str(e)
             }
     
-    def run_unit_tests(self):
-        """Run unit tests from Phase 1 & 2"""
-        self.print_header("PHASE 1 & 2: Unit Tests")
+    def run_pytest_suites(self, suites):
+        """
+        Run pytest suites in a single in-process session
+        
+        The heavy import graph (FastAPI, MediaPipe, OpenCV) is loaded once
+        for all suites instead of once per pytest subprocess. Per-suite
+        results come from the SuiteReporter plugin.
+        """
+        import pytest
+        
+        descriptions = ", ".join(description for _, _, description in suites)
+        print(f"🔄 {descriptions}...")
+        
+        reporter = SuiteReporter()
+        output = io.StringIO()
+        args = [path for _, path, _ in suites] + ["-v", "--tb=short", "--continue-on-collection-errors"]
+        if self.has_xdist():
+            # One worker per core; xdist_group-marked tests share a worker
+            args += ["-n", "auto", "--dist=loadgroup"]
         
-        # Pose analyzer tests
-        result1 = self.run_command(
-            "pytest tests/test_pose_analyzer.py -v --tb=short",
-            "Pose Analyzer Tests"
-        )
-        self.results['pose_analyzer_tests'] = result1
+        try:
+            with redirect_stdout(output), redirect_stderr(output):
+                exit_code = int(pytest.main(args, plugins=[reporter]))
+        except Exception as e:
+            exit_code = -1
+            output.write(str(e))
         
-        # Movement classifier tests
-        result2 = self.run_command(
-            "pytest tests/test_movement_classifier.py -v --tb=short",
-            "Movement Classifier Tests"
-        )
-        self.results['movement_classifier_tests'] = result2
+        log = output.getvalue()
+        all_passed = True
         
-        return result1['success'] and result2['success']
+        for key, path, description in suites:
+            name = Path(path).name
+            success = name in reporter.ran and name not in reporter.failed
+            all_passed = all_passed and success
+            
+            if success:
+                print(f"✅ {description} - PASSED\n")
+            else:
+                print(f"❌ {description} - FAILED\n")
+            
+            self.results[key] = {
+                'success': success,
+                'returncode': 0 if success else (exit_code or 1),
+                'stdout': log,
+                'stderr': ''
+            }
+        
+        if not all_passed:
+            print(f"Error output:\n{log[-500:]}\n")
+        
+        return all_passed
+    
+    def run_unit_tests(self):
+        """Run unit tests from Phase 1 & 2"""
+        self.print_header("PHASE 1 & 2: Unit Tests")
+        return self.run_pytest_suites(UNIT_SUITES)
     
     def run_api_tests(self):
         """Run API tests from Phase 3"""
         self.print_header("PHASE 3: API Tests")
-        
-        result = self.run_command(
-            "pytest tests/test_api.py -v --tb=short",
-            "API Endpoint Tests"
-        )
-        self.results['api_tests'] = result
-        
-        return result['success']
+        return self.run_pytest_suites([API_SUITE])
     
     def run_integration_tests(self):
         """Run integration tests from Phase 5"""
         self.print_header("PHASE 5: Integration Tests")
-        
-        result = self.run_command(
-            "pytest tests/test_integration.py -v --tb=short",
-            "Integration Tests"
-        )
-        self.results['integration_tests'] = result
-        
-        return result['success']
+        return self.run_pytest_suites([INTEGRATION_SUITE])
     
     def run_coverage_report(self):
         """Generate code coverage report"""
@@ -134,23 +191,32 @@ class TestRunner:
         """Check code quality with flake8 (optional)"""
         self.print_header("Code Quality Check")
         
-        # Check if flake8 is installed
-        try:
-            subprocess.run(['flake8', '--version'], capture_output=True, check=True)
-            has_flake8 = True
-        except:
-            has_flake8 = False
-        
-        if has_flake8:
-            result = self.run_command(
+        if self.has_flake8():
+            self.results['code_quality'] = self.run_command(
                 "flake8 app/ --max-line-length=100 --ignore=E501,W503",
                 "Code Quality (flake8)"
             )
-            self.results['code_quality'] = result
         else:
-            print("⚠️  flake8 not installed - skipping code quality check")
-            print("   Install with: pip install flake8\n")
-            self.results['code_quality'] = {'success': True, 'skipped': True}
+            self.skip_code_quality()
+    
+    def has_xdist(self):
+        """Check if pytest-xdist is installed"""
+        import importlib.util
+        return importlib.util.find_spec("xdist") is not None
+    
+    def has_flake8(self):
+        """Check if flake8 is installed"""
+        try:
+            subprocess.run(['flake8', '--version'], capture_output=True, check=True)
+            return True
+        except:
+            return False
+    
+    def skip_code_quality(self):
+        """Record the code quality check as skipped"""
+        print("⚠️  flake8 not installed - skipping code quality check")
+        print("   Install with: pip install flake8\n")
+        self.results['code_quality'] = {'success': True, 'skipped': True}
     
     def generate_summary(self):
         """Generate test summary"""
@@ -210,8 +276,8 @@ class TestRunner:
                 'returncode': result.get('returncode', 0)
             }
         
-        with open(filename, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
         
         print(f"📄 Detailed report saved to {filename}\n")
     
@@ -240,24 +306,16 @@ class TestRunner:
         print(f"   Working directory: {os.getcwd()}")
         print(f"   Test directory: {Path('tests').absolute()}")
         
-        # Run all test suites
-        results = []
-        
-        # Phase 1 & 2: Unit Tests
-        results.append(self.run_unit_tests())
-        
-        # Phase 3: API Tests
-        results.append(self.run_api_tests())
-        
-        # Phase 5: Integration Tests
-        results.append(self.run_integration_tests())
-        
-        # Coverage Report
-        self.run_coverage_report()
+        # Unit, API and integration suites share one in-process pytest session
+        self.print_header("PHASES 1-5: Unit, API & Integration Tests")
+        self.run_pytest_suites(UNIT_SUITES + [API_SUITE, INTEGRATION_SUITE])
         
         # Code Quality (optional)
         self.check_code_quality()
         
+        # Coverage Report (separate process so coverage sees every import)
+        self.run_coverage_report()
+        
         self.end_time = time.time()
         
         # Generate summary
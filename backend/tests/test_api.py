@@ -41,6 +41,20 @@ class TestHealthEndpoints:
         assert data["status"] == "healthy"
         assert "timestamp" in data
         assert "active_sessions" in data
+        
+        # The hand-built payload must still match the declared response model
+        from app.models.responses import HealthResponse
+        assert HealthResponse(**data).model_dump() == data
+    
+    def test_info_endpoint(self):
+        """Test info endpoint returns API info"""
+        response = client.get("/info")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == "Dance Movement Analysis API"
+        assert data["status"] == "online"
+        assert isinstance(data["models_loaded"], bool)
+        assert "endpoints" in data
 
 
 class TestUploadEndpoint:
@@ -102,6 +116,31 @@ class TestAnalysisEndpoints:
         response = client.get("/api/download/invalid-session-id")
         assert response.status_code == 404
 
+    def test_get_results_completed_session(self, tmp_path):
+        """Test results of a completed session are returned from the results file"""
+        from app.services.session_manager import session_manager
+
+        results_path = tmp_path / "results.json"
+        results_path.write_bytes(b'{"processing":{"total_frames":10},"pose_analysis":{"detection_rate":0.9}}')
+
+        session_id = "results-test-session"
+        session_manager.create_session(session_id, "dance.mp4", str(tmp_path / "dance.mp4"), {})
+        session_manager.update_session(session_id, {
+            "status": "completed",
+            "results_path": str(results_path)
+        })
+
+        try:
+            response = client.get(f"/api/results/{session_id}")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["success"] is True
+            assert data["status"] == "completed"
+            assert data["download_url"] == f"/api/download/{session_id}"
+            assert data["results"]["processing"]["total_frames"] == 10
+        finally:
+            session_manager.delete_session(session_id)
+
 
 class TestSessionManagement:
     """Test session management endpoints"""
@@ -116,11 +155,50 @@ class TestSessionManagement:
         assert "sessions" in data
         assert isinstance(data["sessions"], list)
     
+    def test_list_sessions_follows_lookup_order(self):
+        """Test the cached summary is rebuilt when a lookup reorders sessions"""
+        from app.services.session_manager import session_manager
+
+        first, second = "order-test-first", "order-test-second"
+        try:
+            session_manager.create_session(first, "a.mp4", "/nonexistent/a.mp4", {})
+            session_manager.create_session(second, "b.mp4", "/nonexistent/b.mp4", {})
+            summary = session_manager.list_sessions()
+            assert [s["session_id"] for s in summary[-2:]] == [first, second]
+
+            summary.clear()
+            session_manager.get_session(first)
+            assert [s["session_id"] for s in session_manager.list_sessions()[-2:]] == [second, first]
+        finally:
+            session_manager.delete_session(first)
+            session_manager.delete_session(second)
+    
     def test_delete_nonexistent_session(self):
         """Test deleting non-existent session"""
         response = client.delete("/api/session/invalid-session-id")
         assert response.status_code == 404
 
+    def test_expired_session_lookup_defers_file_cleanup(self, monkeypatch):
+        """Test looking up an expired session does no file cleanup itself"""
+        from collections import deque
+        from app.services.session_manager import session_manager
+
+        cleaned = []
+        monkeypatch.setattr(session_manager, "on_evict", cleaned.append)
+        monkeypatch.setattr(session_manager, "_evicted", deque())
+
+        session_id = "expired-test-session"
+        session_manager.create_session(session_id, "dance.mp4", "/nonexistent/dance.mp4", {})
+        session_manager._last_access[session_id] -= session_manager.ttl_seconds + 1
+
+        assert session_manager.get_session(session_id) is None
+        assert session_id not in session_manager.sessions
+        assert cleaned == []
+
+        assert session_manager.cleanup_evicted() == 1
+        assert [s["session_id"] for s in cleaned] == [session_id]
+        assert cleaned[0]["status"] == "expired"
+
 
 class TestWebSocket:
     """Test WebSocket functionality"""
@@ -170,6 +248,95 @@ class TestErrorHandling:
         assert response.status_code == 405
 
 
+class TestDownload:
+    """Test processed video download"""
+
+    @pytest.fixture
+    def completed_session(self, tmp_path):
+        """Create a completed session with a fake output video"""
+        from app.services.session_manager import session_manager
+
+        output_path = tmp_path / "analyzed.mp4"
+        output_path.write_bytes(bytes(range(256)) * 4)
+
+        session_id = "download-test-session"
+        session_manager.create_session(session_id, "dance.mp4", str(tmp_path / "dance.mp4"), {})
+        session_manager.update_session(session_id, {
+            "status": "completed",
+            "output_path": str(output_path)
+        })
+        yield session_id, output_path.read_bytes()
+        session_manager.delete_session(session_id)
+
+    def test_download_full(self, completed_session):
+        """Test downloading the whole processed video"""
+        session_id, content = completed_session
+        response = client.get(f"/api/download/{session_id}")
+        assert response.status_code == 200
+        assert response.content == content
+
+    def test_download_range(self, completed_session):
+        """Test byte range requests return partial content"""
+        session_id, content = completed_session
+        response = client.get(f"/api/download/{session_id}", headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+        assert response.content == content[100:200]
+
+        response = client.get(f"/api/download/{session_id}", headers={"Range": "bytes=-24"})
+        assert response.status_code == 206
+        assert response.content == content[-24:]
+
+    def test_download_not_modified(self, completed_session):
+        """Test If-Modified-Since matching Last-Modified returns 304"""
+        session_id, _ = completed_session
+        response = client.get(f"/api/download/{session_id}")
+        last_modified = response.headers["last-modified"]
+
+        response = client.get(f"/api/download/{session_id}", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_release_keeps_inflight_map_readable(self, completed_session):
+        """Test releasing a session's map does not break downloads still using it"""
+        from app.services.session_manager import session_manager
+        from app.services.video_service import video_service
+
+        session_id, content = completed_session
+        output_path = Path(session_manager.get_session(session_id)["output_path"])
+        mm = video_service.get_output_mmap(output_path)
+
+        video_service.release_output_mmap(str(output_path))
+
+        assert not mm.closed
+        assert mm[:16] == content[:16]
+        assert video_service.get_output_mmap(output_path) is not mm
+
+    def test_storage_cleanup_releases_map(self, completed_session, monkeypatch):
+        """Test files deleted by the storage pass have their maps released"""
+        from app.services.cleanup_service import cleanup_service
+        from app.services.session_manager import session_manager
+        from app.services.video_service import video_service
+
+        session_id, content = completed_session
+        output_path = Path(session_manager.get_session(session_id)["output_path"])
+        mm = video_service.get_output_mmap(output_path)
+
+        monkeypatch.setattr(cleanup_service, "max_storage_bytes", 0)
+        stat = output_path.stat()
+        deleted = cleanup_service._cleanup_by_storage_limit([(str(output_path), stat.st_size, stat.st_mtime)])
+
+        assert deleted == 1
+        assert str(output_path) not in video_service._output_mmaps
+        assert mm[:16] == content[:16]
+
+    def test_download_unsatisfiable_range(self, completed_session):
+        """Test out-of-bounds ranges are rejected"""
+        session_id, content = completed_session
+        response = client.get(f"/api/download/{session_id}", headers={"Range": f"bytes={len(content)}-"})
+        assert response.status_code == 416
+
+
 # Integration Test (requires actual video file)
 class TestFullWorkflow:
     """Test complete upload-analyze-download workflow"""
@@ -4,7 +4,10 @@ Tests complete workflows and API integration
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
+import httpx
+import io
 import os
 from pathlib import Path
 from fastapi.testclient import TestClient
@@ -16,90 +19,136 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.main import app
 
-client = TestClient(app)
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient per test session (and so per xdist worker)"""
+    return TestClient(app)
+
+
+@pytest_asyncio.fixture
+async def ac():
+    """Async client calling the ASGI app directly, for simple endpoint checks"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+def _open_fast_writer(video_path, fps, size):
+    """Open an FFmpeg writer, preferring fast-preset H.264 over software MPEG-4"""
+    # x264 options are read when the writer is constructed
+    previous = os.environ.get("OPENCV_FFMPEG_WRITER_OPTIONS")
+    os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"] = "preset;ultrafast|tune;zerolatency|crf;28"
+    try:
+        out = cv2.VideoWriter(str(video_path), cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*'avc1'), fps, size)
+    finally:
+        if previous is None:
+            os.environ.pop("OPENCV_FFMPEG_WRITER_OPTIONS", None)
+        else:
+            os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"] = previous
+    
+    # OpenCV wheels are usually built without an H.264 encoder
+    if not out.isOpened():
+        out = cv2.VideoWriter(str(video_path), cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    return out
+
+
+@pytest.fixture(scope="session")
+def sample_video(tmp_path_factory):
+    """Create a sample video file once and share it across tests"""
+    video_path = tmp_path_factory.mktemp("videos") / "test_dance.mp4"
+    
+    # Create a simple test video
+    out = _open_fast_writer(video_path, 30.0, (640, 480))
+    
+    # Write 90 frames (3 seconds at 30 fps); the circle path is computed
+    # up front and a single frame buffer is redrawn each time
+    i = np.arange(90)
+    xs = (320 + 100 * np.sin(i * 0.1)).astype(np.int32).tolist()
+    ys = (240 + 50 * np.cos(i * 0.1)).astype(np.int32).tolist()
+    
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    for x, y in zip(xs, ys):
+        frame.fill(0)
+        # Add some movement
+        cv2.circle(frame, (x, y), 30, (255, 255, 255), -1)
+        out.write(frame)
+    
+    out.release()
+    return video_path
+
+
+@pytest.fixture(scope="session")
+def sample_video_bytes(sample_video):
+    """Encoded sample video held in memory for repeated uploads"""
+    return sample_video.read_bytes()
 
 
 class TestIntegration:
     """Integration tests for complete workflows"""
     
-    @pytest.fixture
-    def sample_video(self, tmp_path):
-        """Create a sample video file for testing"""
-        video_path = tmp_path / "test_dance.mp4"
-        
-        # Create a simple test video
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(video_path), fourcc, 30.0, (640, 480))
-        
-        # Write 90 frames (3 seconds at 30 fps)
-        for i in range(90):
-            frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            # Add some movement
-            x = int(320 + 100 * np.sin(i * 0.1))
-            y = int(240 + 50 * np.cos(i * 0.1))
-            cv2.circle(frame, (x, y), 30, (255, 255, 255), -1)
-            out.write(frame)
-        
-        out.release()
-        return video_path
-    
-    def test_complete_workflow(self, sample_video):
+    def test_complete_workflow(self, sample_video_bytes):
         """Test complete upload -> analyze -> download workflow"""
         
-        # Step 1: Upload video
-        with open(sample_video, 'rb') as f:
-            response = client.post(
+        # A context-managed client keeps one event loop alive across requests,
+        # so the background processing task started by /api/analyze survives
+        with TestClient(app) as live_client:
+            # Step 1: Upload video
+            response = live_client.post(
                 "/api/upload",
-                files={"file": ("test.mp4", f, "video/mp4")}
+                files={"file": ("test.mp4", io.BytesIO(sample_video_bytes), "video/mp4")}
             )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        assert "session_id" in data
-        session_id = data["session_id"]
-        
-        # Step 2: Start analysis
-        response = client.post(f"/api/analyze/{session_id}")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        
-        # Step 3: Wait for processing (in real scenario, use WebSocket)
-        import time
-        max_wait = 60  # 60 seconds timeout
-        waited = 0
-        
-        while waited < max_wait:
-            response = client.get(f"/api/results/{session_id}")
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "completed":
-                    break
-            time.sleep(2)
-            waited += 2
-        
-        assert waited < max_wait, "Processing timed out"
-        
-        # Step 4: Verify results
-        response = client.get(f"/api/results/{session_id}")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        assert "results" in data
-        
-        results = data["results"]
-        assert "processing" in results
-        assert "pose_analysis" in results
-        assert "movement_analysis" in results
-        
-        # Step 5: Download processed video
-        response = client.get(f"/api/download/{session_id}")
-        assert response.status_code == 200
-        assert response.headers["content-type"] == "video/mp4"
-        assert len(response.content) > 0
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["success"] is True
+            assert "session_id" in data
+            session_id = data["session_id"]
+            
+            # Step 2: Start analysis
+            response = live_client.post(f"/api/analyze/{session_id}")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["success"] is True
+            
+            # Step 3: Wait for processing, polling with backoff (50ms up to 1s)
+            import time
+            max_wait = 60  # 60 seconds timeout
+            deadline = time.monotonic() + max_wait
+            delay = 0.05
+            completed = False
+            
+            while time.monotonic() < deadline:
+                response = live_client.get(f"/api/results/{session_id}")
+                if response.status_code == 200:
+                    status = response.json().get("status")
+                    if status == "completed":
+                        completed = True
+                        break
+                    assert status != "failed", "Processing failed"
+                time.sleep(delay)
+                delay = min(delay * 1.5, 1.0)
+            
+            assert completed, "Processing timed out"
+            
+            # Step 4: Verify results
+            response = live_client.get(f"/api/results/{session_id}")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["success"] is True
+            assert "results" in data
+            
+            results = data["results"]
+            assert "processing" in results
+            assert "pose_analysis" in results
+            assert "movement_analysis" in results
+            
+            # Step 5: Download processed video
+            response = live_client.get(f"/api/download/{session_id}")
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "video/mp4"
+            assert len(response.content) > 0
     
-    def test_invalid_session_handling(self):
+    def test_invalid_session_handling(self, client):
         """Test handling of invalid session IDs"""
         
         fake_session_id = "invalid-session-id-12345"
@@ -116,18 +165,18 @@ class TestIntegration:
         response = client.get(f"/api/download/{fake_session_id}")
         assert response.status_code == 404
     
-    def test_concurrent_sessions(self, sample_video):
+    @pytest.mark.xdist_group("heavy")
+    def test_concurrent_sessions(self, client, sample_video_bytes):
         """Test handling multiple concurrent sessions"""
         
         session_ids = []
         
         # Upload multiple videos
         for i in range(3):
-            with open(sample_video, 'rb') as f:
-                response = client.post(
-                    "/api/upload",
-                    files={"file": (f"test{i}.mp4", f, "video/mp4")}
-                )
+            response = client.post(
+                "/api/upload",
+                files={"file": (f"test{i}.mp4", io.BytesIO(sample_video_bytes), "video/mp4")}
+            )
             assert response.status_code == 200
             session_ids.append(response.json()["session_id"])
         
@@ -142,15 +191,14 @@ class TestIntegration:
         data = response.json()
         assert data["count"] >= 3
     
-    def test_session_cleanup(self, sample_video):
+    def test_session_cleanup(self, client, sample_video_bytes):
         """Test session deletion and cleanup"""
         
         # Upload
-        with open(sample_video, 'rb') as f:
-            response = client.post(
-                "/api/upload",
-                files={"file": ("test.mp4", f, "video/mp4")}
-            )
+        response = client.post(
+            "/api/upload",
+            files={"file": ("test.mp4", io.BytesIO(sample_video_bytes), "video/mp4")}
+        )
         session_id = response.json()["session_id"]
         
         # Delete session
@@ -161,9 +209,33 @@ class TestIntegration:
         response = client.get(f"/api/results/{session_id}")
         assert response.status_code == 404
     
-    def test_health_endpoint(self):
+    @pytest.mark.xdist_group("heavy")
+    @pytest.mark.asyncio
+    async def test_processing_pool_recovers_from_dead_worker(self):
+        """Test a killed worker breaks only in-flight work, not later jobs"""
+        import signal
+        from app.services.processing_service import ProcessingService
+        
+        service = ProcessingService(max_workers=1)
+        service.start()
+        try:
+            worker_pid = await service._run_in_pool(os.getpid)
+            broken = service.executor
+            
+            os.kill(worker_pid, signal.SIGKILL)
+            
+            # The job lands on (or is retried from) the broken pool and must
+            # still complete on a fresh worker
+            new_pid = await service._run_in_pool(os.getpid)
+            assert new_pid != worker_pid
+            assert service.executor is not broken
+        finally:
+            service.stop()
+    
+    @pytest.mark.asyncio
+    async def test_health_endpoint(self, ac):
         """Test health check endpoint"""
-        response = client.get("/health")
+        response = await ac.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "healthy"
@@ -174,18 +246,20 @@ class TestIntegration:
 class TestAPIEndpoints:
     """Test individual API endpoints"""
     
-    def test_root_endpoint(self):
+    @pytest.mark.asyncio
+    async def test_root_endpoint(self, ac):
         """Test root endpoint serves frontend"""
-        response = client.get("/")
+        response = await ac.get("/")
         assert response.status_code == 200
         assert "text/html" in response.headers["content-type"]
     
-    def test_api_docs(self):
+    @pytest.mark.asyncio
+    async def test_api_docs(self, ac):
         """Test API documentation endpoint"""
-        response = client.get("/api/docs")
+        response = await ac.get("/api/docs")
         assert response.status_code == 200
     
-    def test_upload_validation(self):
+    def test_upload_validation(self, client):
         """Test file upload validation"""
         
         # Test no file
@@ -200,21 +274,40 @@ class TestAPIEndpoints:
         )
         assert response.status_code == 400
     
-    def test_analyze_without_upload(self):
+    def test_analyze_without_upload(self, client):
         """Test analyze endpoint without prior upload"""
         response = client.post("/api/analyze/nonexistent-session")
         assert response.status_code == 404
     
-    def test_cors_headers(self):
+    def test_cors_headers(self, client):
         """Test CORS headers are present"""
         response = client.options("/api/upload")
         assert "access-control-allow-origin" in response.headers
 
+    
+    @pytest.mark.asyncio
+    async def test_readonly_endpoints_smoke(self, ac):
+        """Test read-only endpoints together; wall time is the slowest, not the sum"""
+        preflight = {"Origin": "http://localhost:3000", "Access-Control-Request-Method": "POST"}
+        expected = [
+            (ac.get("/"), 200),
+            (ac.get("/api/docs"), 200),
+            (ac.get("/health"), 200),
+            (ac.get("/api/sessions"), 200),
+            (ac.options("/api/upload", headers=preflight), 200),
+            (ac.post("/api/analyze/nonexistent-session"), 404)
+        ]
+        
+        responses = await asyncio.gather(*(request for request, _ in expected))
+        
+        for response, (_, status_code) in zip(responses, expected):
+            assert response.status_code == status_code, response.request.url
+
 
 class TestErrorHandling:
     """Test error handling scenarios"""
     
-    def test_malformed_video(self, tmp_path):
+    def test_malformed_video(self, client, tmp_path):
         """Test handling of malformed video file"""
         
         # Create a fake video file
@@ -234,15 +327,24 @@ class TestErrorHandling:
             # Processing should fail but not crash
             assert response.status_code in [200, 400, 500]
     
-    def test_oversized_file(self):
+    def test_oversized_file(self, client):
         """Test handling of oversized file"""
         
-        # Create a large fake file (> 100MB)
-        large_content = b"x" * (101 * 1024 * 1024)  # 101 MB
+        # Declare a 101 MB body but send only the multipart preamble; an
+        # upload limit can reject it from Content-Length before the body is read
+        preamble = (
+            b"--x\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="large.mp4"\r\n'
+            b"Content-Type: video/mp4\r\n\r\n"
+        ) + b"x" * 1024
         
         response = client.post(
             "/api/upload",
-            files={"file": ("large.mp4", large_content, "video/mp4")}
+            content=preamble,
+            headers={
+                "Content-Type": "multipart/form-data; boundary=x",
+                "Content-Length": str(101 * 1024 * 1024)
+            }
         )
         
         assert response.status_code == 413  # Payload too large
@@ -251,24 +353,26 @@ class TestErrorHandling:
 class TestPerformance:
     """Performance and load tests"""
     
-    def test_response_times(self):
+    @pytest.mark.asyncio
+    async def test_response_times(self, ac):
         """Test API response times are acceptable"""
         import time
         
         # Health check should be fast
         start = time.time()
-        response = client.get("/health")
+        response = await ac.get("/health")
         duration = time.time() - start
         
         assert duration < 0.1  # Should respond in < 100ms
         assert response.status_code == 200
     
-    def test_sessions_list_performance(self):
+    @pytest.mark.asyncio
+    async def test_sessions_list_performance(self, ac):
         """Test sessions list endpoint performance"""
         import time
         
         start = time.time()
-        response = client.get("/api/sessions")
+        response = await ac.get("/api/sessions")
         duration = time.time() - start
         
         assert duration < 0.5  # Should respond in < 500ms
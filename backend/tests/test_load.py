@@ -4,12 +4,18 @@ Tests system performance under various loads
 """
 
 import asyncio
+import aiofiles
 import aiohttp
+import mmap
+import os
+import ssl
 import time
 import statistics
 from pathlib import Path
-from typing import List, Dict
-import json
+from typing import List, Dict, Optional
+
+import numpy as np
+import orjson
 
 
 class LoadTester:
@@ -17,109 +23,200 @@ class LoadTester:
     
     def __init__(self, base_url: str = "http://localhost:7860"):
         self.base_url = base_url
+        # Every result in request order, plus per-endpoint lists filled on insert
         self.results: List[Dict] = []
+        self.upload_results: List[Dict] = []
+        self.health_results: List[Dict] = []
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._video_path: Optional[Path] = None
+        self._video_mmap: Optional[mmap.mmap] = None
+    
+    async def __aenter__(self):
+        """Open one pooled session shared by every test run"""
+        # One SSL context for the whole pool so TLS sessions can be resumed
+        ssl_ctx = ssl.create_default_context() if self.base_url.startswith("https") else None
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=200,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True,
+            ssl=ssl_ctx
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+        self.release()
+    
+    def prime(self, video_path: Path):
+        """Map the test video once so every upload shares the same read-only pages"""
+        if self._video_path == video_path:
+            return
+        
+        self.release()
+        fd = os.open(video_path, os.O_RDONLY)
+        try:
+            self._video_mmap = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        self._video_path = video_path
+    
+    def release(self):
+        """Unmap the primed test video"""
+        if self._video_mmap is not None:
+            self._video_mmap.close()
+        self._video_path = None
+        self._video_mmap = None
+    
+    @staticmethod
+    async def _read_chunks(video_path: Path, chunk_size: int = 64 * 1024):
+        """Stream a file in chunks without blocking the event loop"""
+        async with aiofiles.open(video_path, 'rb') as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+    
+    def _record(self, bucket: List[Dict], result: Dict) -> Dict:
+        """Store a result in request order and in its endpoint's list"""
+        self.results.append(result)
+        bucket.append(result)
+        return result
     
     async def upload_video(self, session: aiohttp.ClientSession, video_path: Path) -> Dict:
         """Upload a video and measure response time"""
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            with open(video_path, 'rb') as f:
-                data = aiohttp.FormData()
-                data.add_field('file',
-                             f,
-                             filename=video_path.name,
-                             content_type='video/mp4')
+            # Primed videos are sent straight from the shared mapping
+            if video_path == self._video_path:
+                body = memoryview(self._video_mmap)
+            else:
+                body = self._read_chunks(video_path)
+            
+            data = aiohttp.FormData()
+            data.add_field('file',
+                         body,
+                         filename=video_path.name,
+                         content_type='video/mp4')
+            
+            async with session.post(f"{self.base_url}/api/upload", data=data) as response:
+                response_time_ns = time.perf_counter_ns() - start_ns
+                result = await response.json()
                 
-                async with session.post(f"{self.base_url}/api/upload", data=data) as response:
-                    response_time = time.time() - start_time
-                    result = await response.json()
-                    
-                    return {
-                        'endpoint': 'upload',
-                        'status': response.status,
-                        'response_time': response_time,
-                        'success': response.status == 200,
-                        'session_id': result.get('session_id') if response.status == 200 else None
-                    }
+                return self._record(self.upload_results, {
+                    'endpoint': 'upload',
+                    'status': response.status,
+                    'response_time_ns': response_time_ns,
+                    'success': response.status == 200,
+                    'session_id': result.get('session_id') if response.status == 200 else None
+                })
         except Exception as e:
-            return {
+            return self._record(self.upload_results, {
                 'endpoint': 'upload',
                 'status': 0,
-                'response_time': time.time() - start_time,
+                'response_time_ns': time.perf_counter_ns() - start_ns,
                 'success': False,
                 'error': str(e)
-            }
+            })
     
     async def health_check(self, session: aiohttp.ClientSession) -> Dict:
         """Check API health"""
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             async with session.get(f"{self.base_url}/health") as response:
-                response_time = time.time() - start_time
+                response_time_ns = time.perf_counter_ns() - start_ns
                 
-                return {
+                return self._record(self.health_results, {
                     'endpoint': 'health',
                     'status': response.status,
-                    'response_time': response_time,
+                    'response_time_ns': response_time_ns,
                     'success': response.status == 200
-                }
+                })
         except Exception as e:
-            return {
+            return self._record(self.health_results, {
                 'endpoint': 'health',
                 'status': 0,
-                'response_time': time.time() - start_time,
+                'response_time_ns': time.perf_counter_ns() - start_ns,
                 'success': False,
                 'error': str(e)
-            }
+            })
     
     async def concurrent_uploads(self, video_path: Path, num_concurrent: int = 5):
         """Test concurrent uploads"""
         print(f"\n🔄 Testing {num_concurrent} concurrent uploads...")
         
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.upload_video(session, video_path) for _ in range(num_concurrent)]
-            results = await asyncio.gather(*tasks)
-            
-            self.results.extend(results)
-            
-            # Calculate statistics
-            response_times = [r['response_time'] for r in results if r['success']]
-            success_rate = sum(1 for r in results if r['success']) / len(results) * 100
-            
-            print(f"\n📊 Results:")
-            print(f"   Success Rate: {success_rate:.1f}%")
-            if response_times:
-                print(f"   Avg Response Time: {statistics.mean(response_times):.2f}s")
-                print(f"   Min Response Time: {min(response_times):.2f}s")
-                print(f"   Max Response Time: {max(response_times):.2f}s")
-                print(f"   Median Response Time: {statistics.median(response_times):.2f}s")
-            
-            return results
+        self.prime(video_path)
+        tasks = [self.upload_video(self.session, video_path) for _ in range(num_concurrent)]
+        results = await asyncio.gather(*tasks)
+        
+        # Calculate statistics
+        response_times = [r['response_time_ns'] / 1e9 for r in results if r['success']]
+        success_rate = sum(1 for r in results if r['success']) / len(results) * 100
+        
+        print(f"\n📊 Results:")
+        print(f"   Success Rate: {success_rate:.1f}%")
+        if response_times:
+            print(f"   Avg Response Time: {statistics.mean(response_times):.2f}s")
+            print(f"   Min Response Time: {min(response_times):.2f}s")
+            print(f"   Max Response Time: {max(response_times):.2f}s")
+            print(f"   Median Response Time: {statistics.median(response_times):.2f}s")
+        
+        return results
     
-    async def stress_test(self, video_path: Path, duration_seconds: int = 60):
-        """Stress test by continuously uploading for a duration"""
-        print(f"\n⚡ Stress testing for {duration_seconds} seconds...")
+    async def stress_test(
+        self,
+        video_path: Path,
+        duration_seconds: int = 60,
+        target_rps: Optional[float] = None,
+        concurrency: int = 10
+    ):
+        """
+        Stress test by continuously uploading for a duration
         
-        start_time = time.time()
+        Args:
+            video_path: Video to upload
+            duration_seconds: How long to keep sending requests
+            target_rps: Pace requests at this rate; None sends as fast as the
+                server accepts them
+            concurrency: Number of uploads kept in flight
+        """
+        rate = f" at {target_rps:g} req/s" if target_rps else ""
+        print(f"\n⚡ Stress testing for {duration_seconds} seconds{rate}...")
+        
+        start_time = time.perf_counter()
+        deadline = start_time + duration_seconds
         upload_count = 0
         errors = 0
+        scheduled = 0
         
-        async with aiohttp.ClientSession() as session:
-            while time.time() - start_time < duration_seconds:
-                result = await self.upload_video(session, video_path)
-                self.results.append(result)
+        async def worker():
+            nonlocal upload_count, errors, scheduled
+            
+            while True:
+                if target_rps:
+                    # Claim the next slot on the shared schedule and wait for it
+                    next_tick = start_time + scheduled / target_rps
+                    scheduled += 1
+                    if next_tick >= deadline:
+                        return
+                    await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+                elif time.perf_counter() >= deadline:
+                    return
+                
+                result = await self.upload_video(self.session, video_path)
                 
                 if result['success']:
                     upload_count += 1
                 else:
                     errors += 1
-                
-                # Brief pause between requests
-                await asyncio.sleep(0.1)
         
-        total_time = time.time() - start_time
+        self.prime(video_path)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        
+        total_time = time.perf_counter() - start_time
         requests_per_second = upload_count / total_time
         
         print(f"\n📊 Stress Test Results:")
@@ -129,56 +226,95 @@ class LoadTester:
         print(f"   Duration: {total_time:.2f}s")
         print(f"   Requests/Second: {requests_per_second:.2f}")
     
-    async def latency_test(self, num_requests: int = 100):
-        """Test API latency with health checks"""
+    async def latency_test(self, num_requests: int = 100, concurrency: int = 32):
+        """Test API latency with health checks, at most `concurrency` in flight"""
         print(f"\n⚡ Testing latency with {num_requests} health checks...")
         
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.health_check(session) for _ in range(num_requests)]
-            results = await asyncio.gather(*tasks)
+        results = []
+        remaining = num_requests
+        
+        # A fixed pool of workers drains the request budget, so only
+        # `concurrency` coroutines and sockets exist however large N is
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                results.append(await self.health_check(self.session))
+        
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, num_requests))))
+        
+        response_times = [r['response_time_ns'] for r in results if r['success']]
+        
+        if response_times:
+            # One partition-based pass covers every percentile
+            times_ms = np.asarray(response_times) / 1e6
+            p50, p95, p99 = np.percentile(times_ms, [50, 95, 99])
             
-            response_times = [r['response_time'] for r in results if r['success']]
+            print(f"\n📊 Latency Results:")
+            print(f"   Average: {times_ms.mean():.2f}ms")
+            print(f"   Min: {times_ms.min():.2f}ms")
+            print(f"   Max: {times_ms.max():.2f}ms")
+            print(f"   Median: {p50:.2f}ms")
+            print(f"   P95: {p95:.2f}ms")
+            print(f"   P99: {p99:.2f}ms")
+    
+    def generate_report(
+        self,
+        output_path: str = "load_test_report.json",
+        details_path: str = "load_test_details.ndjson"
+    ):
+        """
+        Generate a compact JSON summary plus per-request NDJSON details
+        
+        Args:
+            output_path: Summary report file
+            details_path: One JSON object per line for every recorded request
+        """
+        
+        # Results are already grouped by endpoint; one pass over each group
+        def summarize(endpoint_results: List[Dict]) -> Dict:
+            total = len(endpoint_results)
+            successful = 0
+            time_sum_ns = 0
+            for r in endpoint_results:
+                if r['success']:
+                    successful += 1
+                    time_sum_ns += r['response_time_ns']
             
-            if response_times:
-                print(f"\n📊 Latency Results:")
-                print(f"   Average: {statistics.mean(response_times)*1000:.2f}ms")
-                print(f"   Min: {min(response_times)*1000:.2f}ms")
-                print(f"   Max: {max(response_times)*1000:.2f}ms")
-                print(f"   Median: {statistics.median(response_times)*1000:.2f}ms")
-                print(f"   P95: {sorted(response_times)[int(len(response_times)*0.95)]*1000:.2f}ms")
-                print(f"   P99: {sorted(response_times)[int(len(response_times)*0.99)]*1000:.2f}ms")
-    
-    def generate_report(self, output_path: str = "load_test_report.json"):
-        """Generate JSON report of test results"""
-        
-        # Calculate overall statistics
-        upload_results = [r for r in self.results if r['endpoint'] == 'upload']
-        health_results = [r for r in self.results if r['endpoint'] == 'health']
+            return {
+                'total': total,
+                'successful': successful,
+                'failed': total - successful,
+                'avg_response_time': time_sum_ns / successful / 1e9 if successful else 0
+            }
         
         report = {
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
             'total_requests': len(self.results),
             'summary': {
-                'uploads': {
-                    'total': len(upload_results),
-                    'successful': sum(1 for r in upload_results if r['success']),
-                    'failed': sum(1 for r in upload_results if not r['success']),
-                    'avg_response_time': statistics.mean([r['response_time'] for r in upload_results if r['success']]) if upload_results else 0
-                },
-                'health_checks': {
-                    'total': len(health_results),
-                    'successful': sum(1 for r in health_results if r['success']),
-                    'failed': sum(1 for r in health_results if not r['success']),
-                    'avg_response_time': statistics.mean([r['response_time'] for r in health_results if r['success']]) if health_results else 0
-                }
+                'uploads': summarize(self.upload_results),
+                'health_checks': summarize(self.health_results)
             },
-            'detailed_results': self.results
+            'details_file': details_path
         }
         
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(report))
         
-        print(f"\n📄 Report saved to {output_path}")
+        # Stream details line by line instead of building one large document
+        with open(details_path, 'wb') as f:
+            for r in self.results:
+                f.write(orjson.dumps(r, option=orjson.OPT_APPEND_NEWLINE))
+        
+        print(f"\n📄 Report saved to {output_path} (details in {details_path})")
+    
+    async def generate_report_async(
+        self,
+        output_path: str = "load_test_report.json",
+        details_path: str = "load_test_details.ndjson"
+    ):
+        """Generate the report in a worker thread so the event loop stays free"""
+        await asyncio.to_thread(self.generate_report, output_path, details_path)
 
 
 async def main():
@@ -188,9 +324,6 @@ async def main():
     print("🧪 DanceDynamics - Load Testing")
     print("=" * 60)
     
-    # Initialize tester
-    tester = LoadTester()
-    
     # Check if test video exists
     test_video = Path("sample_videos/test_dance.mp4")
     if not test_video.exists():
@@ -201,41 +334,43 @@ async def main():
     print(f"\n✅ Using test video: {test_video}")
     print(f"   Size: {test_video.stat().st_size / 1024 / 1024:.2f} MB")
     
-    # Test 1: Latency Test
-    print("\n" + "="*60)
-    print("TEST 1: API Latency")
-    print("="*60)
-    await tester.latency_test(num_requests=100)
-    
-    # Test 2: Concurrent Uploads (Light)
-    print("\n" + "="*60)
-    print("TEST 2: Concurrent Uploads (Light Load)")
-    print("="*60)
-    await tester.concurrent_uploads(test_video, num_concurrent=3)
-    
-    # Test 3: Concurrent Uploads (Medium)
-    print("\n" + "="*60)
-    print("TEST 3: Concurrent Uploads (Medium Load)")
-    print("="*60)
-    await tester.concurrent_uploads(test_video, num_concurrent=5)
-    
-    # Test 4: Concurrent Uploads (Heavy)
-    print("\n" + "="*60)
-    print("TEST 4: Concurrent Uploads (Heavy Load)")
-    print("="*60)
-    await tester.concurrent_uploads(test_video, num_concurrent=10)
-    
-    # Test 5: Stress Test (Optional - commented out by default)
-    # print("\n" + "="*60)
-    # print("TEST 5: Stress Test (60 seconds)")
-    # print("="*60)
-    # await tester.stress_test(test_video, duration_seconds=60)
-    
-    # Generate report
-    print("\n" + "="*60)
-    print("📊 Generating Report")
-    print("="*60)
-    tester.generate_report()
+    # Initialize tester; one pooled HTTP session serves every test
+    async with LoadTester() as tester:
+        # Test 1: Latency Test
+        print("\n" + "="*60)
+        print("TEST 1: API Latency")
+        print("="*60)
+        await tester.latency_test(num_requests=100)
+        
+        # Test 2: Concurrent Uploads (Light)
+        print("\n" + "="*60)
+        print("TEST 2: Concurrent Uploads (Light Load)")
+        print("="*60)
+        await tester.concurrent_uploads(test_video, num_concurrent=3)
+        
+        # Test 3: Concurrent Uploads (Medium)
+        print("\n" + "="*60)
+        print("TEST 3: Concurrent Uploads (Medium Load)")
+        print("="*60)
+        await tester.concurrent_uploads(test_video, num_concurrent=5)
+        
+        # Test 4: Concurrent Uploads (Heavy)
+        print("\n" + "="*60)
+        print("TEST 4: Concurrent Uploads (Heavy Load)")
+        print("="*60)
+        await tester.concurrent_uploads(test_video, num_concurrent=10)
+        
+        # Test 5: Stress Test (Optional - commented out by default)
+        # print("\n" + "="*60)
+        # print("TEST 5: Stress Test (60 seconds)")
+        # print("="*60)
+        # await tester.stress_test(test_video, duration_seconds=60)
+        
+        # Generate report
+        print("\n" + "="*60)
+        print("📊 Generating Report")
+        print("="*60)
+        await tester.generate_report_async()
     
     print("\n✅ Load testing complete!")
     print("="*60)
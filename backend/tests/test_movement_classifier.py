@@ -10,88 +10,90 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.movement_classifier import MovementClassifier, MovementType, MovementMetrics
-from app.pose_analyzer import PoseKeypoints
+from app.core.movement_classifier import MovementClassifier, MovementType, MovementMetrics
+from app.core.pose_analyzer import PoseKeypoints
 from app.config import Config
 
+pytestmark = pytest.mark.xdist_group("classifier")
+
 
 class TestMovementClassifier:
     """Test suite for MovementClassifier functionality"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def classifier(self):
-        """Create MovementClassifier instance for testing"""
+        """Create one MovementClassifier for the whole module"""
         return MovementClassifier()
     
+    @pytest.fixture(autouse=True)
+    def _reset_classifier(self, classifier):
+        """Clear the shared classifier's history after each test"""
+        yield
+        classifier.reset()
+    
     @pytest.fixture
-    def standing_sequence(self):
+    def standing_sequence(self, rng):
         """Create a sequence representing standing still"""
-        sequence = []
-        base_landmarks = np.random.rand(33, 3)
+        base_landmarks = rng.random((33, 3), dtype=np.float32)
         
-        for i in range(10):
-            # Very small random noise to simulate standing
-            landmarks = base_landmarks + np.random.normal(0, 0.001, (33, 3))
-            landmarks[:, 2] = 0.9  # High confidence
-            
-            pose = PoseKeypoints(
+        # Very small random noise to simulate standing, drawn for all frames at once
+        # (std 1e-4 at 30 fps averages ~0.005/s, under Config.VELOCITY_STANDING)
+        all_landmarks = base_landmarks + rng.standard_normal((10, 33, 3), dtype=np.float32) * np.float32(1e-4)
+        all_landmarks[..., 2] = 0.9  # High confidence
+        
+        return [
+            PoseKeypoints(
                 landmarks=landmarks,
                 frame_number=i,
                 timestamp=i/30.0,
                 confidence=0.9
             )
-            sequence.append(pose)
-        
-        return sequence
+            for i, landmarks in enumerate(all_landmarks)
+        ]
     
     @pytest.fixture
-    def dancing_sequence(self):
+    def dancing_sequence(self, rng):
         """Create a sequence representing dancing (high movement)"""
-        sequence = []
+        # Create varied movement
+        all_landmarks = rng.random((20, 33, 3), dtype=np.float32)
+        all_landmarks[..., 2] = 0.9
         
-        for i in range(20):
-            # Create varied movement
-            landmarks = np.random.rand(33, 3)
-            landmarks[:, 2] = 0.9
-            
-            # Add more variation to simulate dancing
-            landmarks[:, 0] += np.sin(i * 0.5) * 0.1
-            landmarks[:, 1] += np.cos(i * 0.5) * 0.1
-            
-            pose = PoseKeypoints(
+        # Add more variation to simulate dancing, one offset per frame
+        i = np.arange(20)
+        all_landmarks[..., 0] += (np.sin(i * 0.5) * 0.1)[:, None]
+        all_landmarks[..., 1] += (np.cos(i * 0.5) * 0.1)[:, None]
+        
+        return [
+            PoseKeypoints(
                 landmarks=landmarks,
                 frame_number=i,
                 timestamp=i/30.0,
                 confidence=0.9
             )
-            sequence.append(pose)
-        
-        return sequence
+            for i, landmarks in enumerate(all_landmarks)
+        ]
     
     @pytest.fixture
-    def jumping_sequence(self):
+    def jumping_sequence(self, rng):
         """Create a sequence representing jumping (vertical movement)"""
-        sequence = []
-        base_landmarks = np.random.rand(33, 3)
+        base_landmarks = rng.random((33, 3), dtype=np.float32)
+        all_landmarks = np.repeat(base_landmarks[None], 15, axis=0)
         
-        for i in range(15):
-            landmarks = base_landmarks.copy()
-            
-            # Simulate vertical jump (modify hip positions)
-            jump_height = 0.1 * np.sin(i * np.pi / 7)  # Jump cycle
-            landmarks[23, 1] -= jump_height  # Left hip
-            landmarks[24, 1] -= jump_height  # Right hip
-            landmarks[:, 2] = 0.9
-            
-            pose = PoseKeypoints(
+        # Simulate vertical jump (modify hip positions)
+        jump_height = 0.1 * np.sin(np.arange(15) * np.pi / 7)  # Jump cycle
+        all_landmarks[:, 23, 1] -= jump_height  # Left hip
+        all_landmarks[:, 24, 1] -= jump_height  # Right hip
+        all_landmarks[..., 2] = 0.9
+        
+        return [
+            PoseKeypoints(
                 landmarks=landmarks,
                 frame_number=i,
                 timestamp=i/30.0,
                 confidence=0.9
             )
-            sequence.append(pose)
-        
-        return sequence
+            for i, landmarks in enumerate(all_landmarks)
+        ]
     
     def test_classifier_initialization(self, classifier):
         """Test MovementClassifier initializes correctly"""
@@ -129,23 +131,23 @@ class TestMovementClassifier:
     
     def test_velocity_calculation(self, classifier, dancing_sequence):
         """Test velocity calculation between frames"""
-        velocities = classifier._calculate_velocities(dancing_sequence)
+        velocities = classifier._calculate_velocities(*classifier._stack_sequence(dancing_sequence))
         
         assert len(velocities) == len(dancing_sequence) - 1
         assert np.all(velocities >= 0)  # Velocities should be non-negative
     
     def test_jumping_detection(self, classifier, jumping_sequence):
         """Test jumping detection algorithm"""
-        is_jumping = classifier._detect_jumping(jumping_sequence)
+        is_jumping = classifier._detect_jumping(classifier._stack_sequence(jumping_sequence)[0])
         
         # Jumping sequence should be detected
         # Note: This may be True or False depending on threshold sensitivity
         assert isinstance(is_jumping, bool)
     
-    def test_crouching_detection(self, classifier):
+    def test_crouching_detection(self, classifier, rng):
         """Test crouching detection"""
         # Create crouching pose (compressed torso)
-        landmarks = np.random.rand(33, 3)
+        landmarks = rng.random((33, 3), dtype=np.float32)
         landmarks[11, 1] = 0.3  # Shoulder
         landmarks[12, 1] = 0.3
         landmarks[23, 1] = 0.35  # Hip (very close to shoulder)
@@ -159,13 +161,13 @@ class TestMovementClassifier:
             confidence=0.9
         )
         
-        is_crouching = classifier._detect_crouching([crouch_pose])
+        is_crouching = classifier._detect_crouching(classifier._stack_sequence([crouch_pose])[0])
         
         assert isinstance(is_crouching, bool)
     
     def test_intensity_calculation(self, classifier, dancing_sequence):
         """Test movement intensity calculation"""
-        velocities = classifier._calculate_velocities(dancing_sequence)
+        velocities = classifier._calculate_velocities(*classifier._stack_sequence(dancing_sequence))
         movement_type = MovementType.DANCING
         
         intensity = classifier._calculate_intensity(velocities, movement_type)
@@ -175,7 +177,7 @@ class TestMovementClassifier:
     
     def test_body_part_activity(self, classifier, dancing_sequence):
         """Test body part activity calculation"""
-        activity = classifier._calculate_body_part_activity(dancing_sequence)
+        activity = classifier._calculate_body_part_activity(classifier._stack_sequence(dancing_sequence)[0])
         
         # Should have activity scores for all body parts
         expected_parts = ["head", "torso", "left_arm", "right_arm", "left_leg", "right_leg"]
@@ -230,6 +232,19 @@ class TestMovementClassifier:
         # Peak at index 7 (value=5) should be detected
         assert 7 in peaks
     
+    def test_find_peaks_indices(self, classifier):
+        """Test peak detection returns every qualifying index, as integers"""
+        signal = np.array([0.0, 2.0, 0.0, 1.0, 1.0, 0.0, 3.0, 0.0, 0.5, 0.0])
+        
+        # Plateaus are not peaks; values at or below the threshold are skipped
+        peaks = classifier._find_peaks(signal, threshold_percentile=80)
+        assert peaks.tolist() == [1, 6]
+        assert peaks.dtype.kind == 'i'
+        
+        short = classifier._find_peaks(np.array([1.0, 2.0]))
+        assert len(short) == 0
+        assert short.dtype.kind == 'i'
+    
     def test_movement_smoothness_empty(self, classifier):
         """Test smoothness calculation with minimal data"""
         sequence = []
@@ -245,13 +260,13 @@ class TestMovementClassifier:
         # Standing should be very smooth
         assert smoothness > 80
     
-    def test_movement_smoothness_jerky_motion(self, classifier):
+    def test_movement_smoothness_jerky_motion(self, classifier, rng):
         """Test smoothness with jerky motion"""
         sequence = []
         
         for i in range(10):
             # Create jerky movement (alternating positions)
-            landmarks = np.random.rand(33, 3)
+            landmarks = rng.random((33, 3), dtype=np.float32)
             if i % 2 == 0:
                 landmarks[:, 0] += 0.2
             landmarks[:, 2] = 0.9
@@ -293,6 +308,33 @@ class TestMovementClassifier:
         assert len(classifier.movement_history) == 2
         assert metrics1.intensity != metrics2.intensity
     
+    def test_bounded_history_summary(self, standing_sequence, dancing_sequence):
+        """Test history is capped and the summary only reflects retained sequences"""
+        classifier = MovementClassifier(max_history=2)
+        classifier.analyze_sequence(dancing_sequence)
+        kept = [
+            classifier.analyze_sequence(standing_sequence),
+            classifier.analyze_sequence(dancing_sequence[:10])
+        ]
+        
+        assert list(classifier.movement_history) == kept
+        
+        summary = classifier.get_movement_summary()
+        assert summary['total_sequences'] == 2
+        assert summary['average_intensity'] == round(np.mean([m.intensity for m in kept]), 2)
+        assert sum(summary['movement_distribution'].values()) == 2
+        for part, activity in summary['avg_body_part_activity'].items():
+            expected = np.mean([m.body_part_activity[part] for m in kept])
+            assert abs(activity - expected) < 0.01
+    
+    def test_max_history_must_be_positive(self):
+        """Test a history that could never hold a sequence is rejected"""
+        with pytest.raises(ValueError):
+            MovementClassifier(max_history=0)
+        
+        classifier = MovementClassifier(max_history=1)
+        assert classifier.movement_history.maxlen == 1
+    
     def test_body_parts_defined(self, classifier):
         """Test that all body parts are properly defined"""
         assert 'head' in classifier.BODY_PARTS
@@ -306,6 +348,8 @@ class TestMovementClassifier:
         for part, indices in classifier.BODY_PARTS.items():
             assert len(indices) > 0
             assert all(0 <= idx < 33 for idx in indices)
+            assert indices.dtype == np.intp
+            assert not indices.flags.writeable
 
 
 if __name__ == "__main__":
@@ -12,21 +12,32 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.pose_analyzer import PoseAnalyzer, PoseKeypoints
+from app.core.pose_analyzer import PoseAnalyzer, PoseKeypoints
 from app.config import Config
 
+pytestmark = pytest.mark.xdist_group("pose")
+
 
 class TestPoseAnalyzer:
     """Test suite for PoseAnalyzer functionality"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def analyzer(self):
-        """Create PoseAnalyzer instance for testing"""
-        return PoseAnalyzer()
+        """Create one PoseAnalyzer (and MediaPipe graph) for the whole module"""
+        analyzer = PoseAnalyzer()
+        yield analyzer
+        # Close explicitly; closing from __del__ at interpreter exit hangs
+        analyzer.close()
+    
+    @pytest.fixture(autouse=True)
+    def _reset_analyzer(self, analyzer):
+        """Clear the shared analyzer's history after each test"""
+        yield
+        analyzer.reset()
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def sample_frame(self):
-        """Create a sample frame for testing"""
+        """Create a sample frame once; read-only, tests that modify it must copy"""
         # Create a simple test image (640x480)
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
         
@@ -39,6 +50,7 @@ class TestPoseAnalyzer:
         cv2.line(frame, (320, 300), (280, 450), (255, 255, 255), 3)  # Left leg
         cv2.line(frame, (320, 300), (360, 450), (255, 255, 255), 3)  # Right leg
         
+        frame.flags.writeable = False
         return frame
     
     def test_analyzer_initialization(self, analyzer):
@@ -77,10 +89,10 @@ class TestPoseAnalyzer:
         # Should have "No pose detected" text
         assert not np.array_equal(annotated, sample_frame)
     
-    def test_draw_skeleton_overlay_with_pose(self, analyzer):
+    def test_draw_skeleton_overlay_with_pose(self, analyzer, rng):
         """Test drawing skeleton with valid pose keypoints"""
         # Create mock PoseKeypoints
-        mock_landmarks = np.random.rand(33, 3)
+        mock_landmarks = rng.random((33, 3), dtype=np.float32)
         mock_landmarks[:, 2] = 0.9  # High confidence
         
         mock_pose = PoseKeypoints(
@@ -113,16 +125,56 @@ class TestPoseAnalyzer:
         for result in results:
             assert result is None or isinstance(result, PoseKeypoints)
     
+    def test_process_video_batch_keeps_frame_order(self, analyzer, sample_frame, monkeypatch):
+        """Test pipelined batch processing maps detections back to their frames"""
+        from types import SimpleNamespace
+        
+        # Detect a pose on even frames only, tagged with the frame's index
+        def fake_process(rgb_frame):
+            index = int(rgb_frame[0, 0, 0])
+            if index % 2:
+                return SimpleNamespace(pose_landmarks=None)
+            landmark = SimpleNamespace(x=index / 10, y=0.5, visibility=0.9)
+            return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=[landmark] * 33))
+        
+        monkeypatch.setattr(analyzer, "pose", SimpleNamespace(process=fake_process))
+        
+        frames = []
+        for i in range(6):
+            frame = sample_frame.copy()
+            frame[0, 0] = i
+            frames.append(frame)
+        
+        results = analyzer.process_video_batch(frames=frames, start_frame_number=10, fps=30.0)
+        
+        assert [r is not None for r in results] == [True, False] * 3
+        for i in (0, 2, 4):
+            assert results[i].frame_number == 10 + i
+            assert results[i].timestamp == (10 + i) / 30.0
+            assert results[i].landmarks[0, 0] == np.float32(i / 10)
+        assert [kp.frame_number for kp in analyzer.keypoints_history] == [10, 12, 14]
+    
+    def test_to_rgb_batch_matches_per_frame(self, sample_frame):
+        """Test batched BGR->RGB conversion equals converting each frame"""
+        frames = [np.roll(sample_frame, i, axis=1) for i in range(3)]
+        
+        rgb_frames = list(PoseAnalyzer._to_rgb_batch(frames))
+        
+        assert len(rgb_frames) == 3
+        for frame, rgb_frame in zip(frames, rgb_frames):
+            assert rgb_frame.flags.c_contiguous
+            np.testing.assert_array_equal(rgb_frame, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    
     def test_get_keypoints_array_empty(self, analyzer):
         """Test getting keypoints array when no frames processed"""
         keypoints = analyzer.get_keypoints_array()
         assert keypoints.size == 0
     
-    def test_get_keypoints_array_with_data(self, analyzer):
+    def test_get_keypoints_array_with_data(self, analyzer, rng):
         """Test getting keypoints array with processed data"""
         # Add mock keypoints to history
         for i in range(3):
-            mock_landmarks = np.random.rand(33, 3)
+            mock_landmarks = rng.random((33, 3), dtype=np.float32)
             mock_pose = PoseKeypoints(
                 landmarks=mock_landmarks,
                 frame_number=i,
@@ -133,18 +185,41 @@ class TestPoseAnalyzer:
         
         keypoints = analyzer.get_keypoints_array()
         assert keypoints.shape == (3, 33, 3)
+        assert np.array_equal(keypoints[1], analyzer.keypoints_history[1].landmarks)
+        
+        # The caller gets its own copy, not a view of the history
+        keypoints[1] = 0
+        assert not np.array_equal(keypoints[1], analyzer.keypoints_history[1].landmarks)
+    
+    def test_keypoints_history_grows(self, rng):
+        """Test history keeps every frame when it outgrows its initial buffers"""
+        from app.core.pose_analyzer import KeypointsHistory
+        
+        history = KeypointsHistory(capacity=2)
+        all_landmarks = rng.random((5, 33, 3), dtype=np.float32)
+        for i, landmarks in enumerate(all_landmarks):
+            history.append(PoseKeypoints(landmarks, i, i / 30.0, i / 10))
+        
+        assert len(history) == 5
+        assert np.array_equal(history.landmarks, all_landmarks)
+        assert history[-1].frame_number == 4
+        assert history[3].confidence == np.float32(0.3)
+        
+        history.clear()
+        assert len(history) == 0
+        assert history.landmarks.shape == (0, 33, 3)
     
     def test_get_average_confidence_empty(self, analyzer):
         """Test average confidence with no data"""
         avg_conf = analyzer.get_average_confidence()
         assert avg_conf == 0.0
     
-    def test_get_average_confidence_with_data(self, analyzer):
+    def test_get_average_confidence_with_data(self, analyzer, rng):
         """Test average confidence calculation"""
         confidences = [0.7, 0.8, 0.9]
         
         for i, conf in enumerate(confidences):
-            mock_landmarks = np.random.rand(33, 3)
+            mock_landmarks = rng.random((33, 3), dtype=np.float32)
             mock_pose = PoseKeypoints(
                 landmarks=mock_landmarks,
                 frame_number=i,
@@ -157,10 +232,10 @@ class TestPoseAnalyzer:
         expected = np.mean(confidences)
         assert abs(avg_conf - expected) < 0.001
     
-    def test_reset_analyzer(self, analyzer):
+    def test_reset_analyzer(self, analyzer, rng):
         """Test resetting analyzer clears history"""
         # Add some data
-        mock_landmarks = np.random.rand(33, 3)
+        mock_landmarks = rng.random((33, 3), dtype=np.float32)
         mock_pose = PoseKeypoints(
             landmarks=mock_landmarks,
             frame_number=0,
@@ -211,7 +286,13 @@ class TestPoseAnalyzer:
         extracted = analyzer._extract_landmarks(mock_landmarks)
         
         assert extracted.shape == expected_shape
+        assert extracted.dtype == np.float32
         assert np.all((extracted[:, :2] >= 0) & (extracted[:, :2] <= 1))
+        
+        # Array input takes the fast path and yields the same values
+        from_array = analyzer._extract_landmarks(np.tile([0.5, 0.5, 0.9], (33, 1)))
+        assert from_array.dtype == np.float32
+        np.testing.assert_array_equal(from_array, extracted)
 
 
 def test_config_values():
@@ -163,18 +163,11 @@ function connectWebSocket(sessionId) {
     console.log('🔌 Connecting WebSocket:', wsUrl);
     
     const ws = new WebSocket(wsUrl);
-    let heartbeatInterval;
     
+    // Keepalive is handled by server-sent protocol ping frames
     ws.onopen = () => {
         console.log('✅ WebSocket connected');
         toast.info('Connected - receiving updates');
-        
-        // Send heartbeat every 20 seconds
-        heartbeatInterval = setInterval(() => {
-            if (ws.readyState === WebSocket.OPEN) {
-                ws.send('ping');
-            }
-        }, 20000);
     };
     
     ws.onmessage = (event) => {
@@ -198,14 +191,12 @@ function connectWebSocket(sessionId) {
                     
                 case 'complete':
                     console.log('🎉 Analysis complete!');
-                    clearInterval(heartbeatInterval);
                     handleAnalysisComplete(data);
                     ws.close();
                     break;
                     
                 case 'error':
                     console.error('❌ Error:', data.error);
-                    clearInterval(heartbeatInterval);
                     handleAnalysisError(new Error(data.error));
                     ws.close();
                     break;
@@ -229,7 +220,6 @@ function connectWebSocket(sessionId) {
     
     ws.onclose = (event) => {
         console.log('🔌 WebSocket closed:', event.code, event.reason);
-        clearInterval(heartbeatInterval);
     };
     
     // Store reference for cleanup
@@ -50,4 +50,6 @@ exec uvicorn app.main:app \
     --log-level info \
     --access-log \
     --timeout-keep-alive 30 \
+    --ws-ping-interval 20 \
+    --ws-ping-timeout 30 \
     --no-use-colors
\ No newline at end of file